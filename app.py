@@ -1,70 +1,186 @@
 import os
+import json
+import time
 import uuid
 import shutil
-from flask import Flask, request, render_template, send_file, flash, redirect, url_for
+from concurrent.futures import ThreadPoolExecutor
+from flask import (
+    Flask, Response, request, render_template, send_file, flash, redirect, url_for, jsonify,
+    stream_with_context
+)
 from dotenv import load_dotenv
-import fitz  # PyMuPDF
 
-from mcq_core.generator import generate_mcqs
-from mcq_core.extractor import extract_text_and_images_from_pdf, extract_text_from_pdf
+from mcq_core.generator import GenerationCancelled
 from mcq_core.pdf_utils import generate_mcq_pdf, generate_answer_pdf
+from mcq_core.jobs import (
+    FINISHED_STATUSES,
+    JOBS_FOLDER,
+    append_job_event,
+    create_job,
+    is_cancel_requested,
+    load_job,
+    read_job_events,
+    request_cancel,
+    track_job,
+    untrack_job,
+    update_job,
+)
+from mcq_core.doc_index import INDEX_FOLDER
+from mcq_core.pipeline import (
+    extract_document,
+    generate_document_mcqs,
+    normalize_complexity_distribution,
+)
 
 load_dotenv()
 
-app = Flask(__name__)
-app.secret_key = os.getenv("SECRET_KEY", "your-secret-key-change-this")
-
 UPLOAD_FOLDER = "uploads"
 OUTPUT_FOLDER = "output"
 TEMP_IMAGES_FOLDER = "temp_images"
 
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(OUTPUT_FOLDER, exist_ok=True)
-os.makedirs(TEMP_IMAGES_FOLDER, exist_ok=True)
+# Uploads are deleted after processing; only keep their text in the index cache if asked to
+DOC_INDEX_CACHE = os.getenv("MCQ_DOC_INDEX_CACHE", "0") == "1"
+
+_job_executor = None
+
+
+class GenerationError(Exception):
+    """Generation failed with a message that can be shown to the user"""
+
+
+def get_job_executor():
+    """Per-worker thread pool running submitted jobs (created after fork)"""
+    global _job_executor
+    if _job_executor is None:
+        _job_executor = ThreadPoolExecutor(max_workers=int(os.getenv("MCQ_JOB_THREADS", 4)))
+    return _job_executor
+
+
+def validate_upload(files):
+    """Return (pdf_file, None) for a valid upload, or (None, error message)"""
+    if "pdf" not in files:
+        return None, "No file part in request."
+
+    pdf_file = files["pdf"]
+    if not pdf_file or pdf_file.filename == "":
+        return None, "No file selected."
+
+    if not pdf_file.filename.lower().endswith(".pdf"):
+        return None, "Please upload a valid PDF file."
+
+    return pdf_file, None
+
+
+def parse_generation_params(form):
+    """Validate form values into the generation parameters"""
+    pages_requested = max(1, min(int(form.get("pages", 2)), 50))
+    questions_requested = max(5, min(int(form.get("questions", 10)), 50))
+
+    # Get complexity distribution from sliders
+    complexity_distribution = normalize_complexity_distribution(
+        form.get("low_complexity", 40),
+        form.get("medium_complexity", 40),
+        form.get("hard_complexity", 20)
+    )
+
+    # Optional page selection; takes precedence over the first N pages
+    page_range = form.get("page_range", "").strip() or None
+    chapter = form.get("chapter", "").strip() or None
+
+    return {
+        "pages": pages_requested,
+        "questions": questions_requested,
+        "complexity_distribution": complexity_distribution,
+        "page_range": page_range,
+        "chapter": chapter
+    }
+
+
+def generate_papers(pdf_path, session_id, params, progress=None, should_cancel=None):
+    """Extract, generate and render the question and answer PDFs for one upload.
+
+    Returns the result summary; raises GenerationError with a user-facing
+    message if any stage produces nothing, or GenerationCancelled if
+    ``should_cancel()`` turns true. ``progress(stage, **details)`` receives
+    per-page, per-LLM-call and rendering updates.
+    """
+    session_image_folder = os.path.join(TEMP_IMAGES_FOLDER, session_id)
+    progress = progress or (lambda stage, **details: None)
+    should_cancel = should_cancel or (lambda: False)
+
+    # Extract text and images (with MCQ_DOC_INDEX_CACHE=1, repeat uploads skip the full scan)
+    try:
+        extraction_result = extract_document(
+            pdf_path,
+            params["pages"],
+            session_image_folder,
+            page_range=params["page_range"],
+            chapter=params["chapter"],
+            index_folder=INDEX_FOLDER if DOC_INDEX_CACHE else None,
+            progress=progress
+        )
+    except ValueError as e:
+        raise GenerationError(str(e))
+
+    if not extraction_result["text"].strip():
+        raise GenerationError("No extractable text found in the PDF.")
+
+    page_count = len(extraction_result.get("pages", []))
+    print(f"Extracted text from {page_count} pages")
+    print(f"Found {len(extraction_result['images'])} images")
+
+    if should_cancel():
+        raise GenerationCancelled("Cancelled after extraction")
+
+    # Generate MCQs with complexity support and attach images; returns an MCQBatch
+    # with precomputed counts, consumed directly by the renderers
+    mcqs = generate_document_mcqs(
+        extraction_result, params["questions"], params["complexity_distribution"],
+        progress=progress, should_cancel=should_cancel
+    )
+
+    if not mcqs:
+        raise GenerationError("MCQ generation failed.")
+
+    # Generate PDFs
+    mcq_filename = f"mcqs_{session_id}.pdf"
+    ans_filename = f"answers_{session_id}.pdf"
+
+    mcq_path = os.path.join(OUTPUT_FOLDER, mcq_filename)
+    ans_path = os.path.join(OUTPUT_FOLDER, ans_filename)
+
+    if should_cancel():
+        raise GenerationCancelled("Cancelled before rendering")
+
+    progress("render", document="questions", questions=len(mcqs))
+    if not generate_mcq_pdf(mcqs, mcq_path):
+        raise GenerationError("Failed to create MCQ PDF.")
+
+    progress("render", document="answers", questions=len(mcqs))
+    if not generate_answer_pdf(mcqs, ans_path):
+        raise GenerationError("Failed to create answer key PDF.")
+
+    return {
+        "mcq_path": mcq_filename,
+        "ans_path": ans_filename,
+        "question_count": len(mcqs),
+        "page_count": page_count,
+        "image_count": mcqs.image_count,
+        "complexity_counts": mcqs.complexity_counts
+    }
 
 
-@app.route("/", methods=["GET", "POST"])
 def index():
     if request.method == "POST":
         # File validation
-        if "pdf" not in request.files:
-            flash("No file part in request.", "error")
-            return redirect(request.url)
-
-        pdf_file = request.files["pdf"]
-        if not pdf_file or pdf_file.filename == "":
-            flash("No file selected.", "error")
-            return redirect(request.url)
-
-        if not pdf_file.filename.lower().endswith(".pdf"):
-            flash("Please upload a valid PDF file.", "error")
+        pdf_file, error = validate_upload(request.files)
+        if error:
+            flash(error, "error")
             return redirect(request.url)
 
         try:
             # Get and validate parameters
-            pages_requested = max(1, min(int(request.form.get("pages", 2)), 50))
-            questions_requested = max(5, min(int(request.form.get("questions", 10)), 50))
-
-            # Get complexity distribution from sliders
-            low_percent = max(0, min(100, int(request.form.get("low_complexity", 40))))
-            medium_percent = max(0, min(100, int(request.form.get("medium_complexity", 40))))
-            hard_percent = max(0, min(100, int(request.form.get("hard_complexity", 20))))
-
-            # Normalize percentages
-            total_percent = low_percent + medium_percent + hard_percent
-            if total_percent == 0:
-                low_percent = medium_percent = hard_percent = 33
-                total_percent = 99
-
-            low_percent = int(low_percent * 100 / total_percent)
-            medium_percent = int(medium_percent * 100 / total_percent)
-            hard_percent = 100 - low_percent - medium_percent
-
-            complexity_distribution = {
-                'low': low_percent,
-                'medium': medium_percent,
-                'hard': hard_percent
-            }
+            params = parse_generation_params(request.form)
 
         except Exception as e:
             flash(f"Invalid input values: {e}", "error")
@@ -79,128 +195,180 @@ def index():
         try:
             pdf_file.save(temp_file_path)
 
-            # Extract text and images
-            extraction_result = extract_text_and_images_from_pdf(
-                temp_file_path,
-                max_pages=pages_requested,
-                output_folder=session_image_folder
-            )
-
-            if not extraction_result["text"].strip():
-                flash("No extractable text found in the PDF.", "error")
-                cleanup_temp_files(temp_file_path, session_image_folder)
-                return redirect(request.url)
-
-            print(f"Extracted text from {pages_requested} pages")
-            print(f"Found {len(extraction_result['images'])} images")
-
-            # Generate MCQs with complexity support
-            import inspect
-            sig = inspect.signature(generate_mcqs)
-
-            if 'complexity_distribution' in sig.parameters:
-                mcqs = generate_mcqs(extraction_result["text"], questions_requested, complexity_distribution)
-            else:
-                mcqs = generate_mcqs(extraction_result["text"], questions_requested)
-
-            # Add image references to MCQs
-            if extraction_result["images"]:
-                mcqs = add_image_references_to_mcqs(mcqs, extraction_result["images"])
-
-            if not mcqs:
-                flash("MCQ generation failed.", "error")
-                cleanup_temp_files(temp_file_path, session_image_folder)
-                return redirect(request.url)
-
-            # Generate PDFs
-            mcq_filename = f"mcqs_{session_id}.pdf"
-            ans_filename = f"answers_{session_id}.pdf"
-
-            mcq_path = os.path.join(OUTPUT_FOLDER, mcq_filename)
-            ans_path = os.path.join(OUTPUT_FOLDER, ans_filename)
-
-            if not generate_mcq_pdf(mcqs, mcq_path):
-                flash("Failed to create MCQ PDF.", "error")
-                cleanup_temp_files(temp_file_path, session_image_folder)
-                return redirect(request.url)
-
-            if not generate_answer_pdf(mcqs, ans_path):
-                flash("Failed to create answer key PDF.", "error")
-                cleanup_temp_files(temp_file_path, session_image_folder)
-                return redirect(request.url)
-
-            # Count results
-            complexity_counts = {'easy': 0, 'medium': 0, 'hard': 0}
-            total_images = 0
-
-            for mcq in mcqs:
-                complexity = mcq.get('complexity', 'medium')
-                if complexity in complexity_counts:
-                    complexity_counts[complexity] += 1
-                if mcq.get('images'):
-                    total_images += len(mcq['images'])
-
-            success_message = f'Generated {len(mcqs)} MCQs with {total_images} images! '
+            result = generate_papers(temp_file_path, session_id, params)
+
+            complexity_counts = result["complexity_counts"]
+            success_message = f'Generated {result["question_count"]} MCQs with {result["image_count"]} images! '
             success_message += f'(Easy: {complexity_counts["easy"]}, Medium: {complexity_counts["medium"]}, Hard: {complexity_counts["hard"]})'
             flash(success_message, "success")
 
-            # Clean up temp files
-            cleanup_temp_files(temp_file_path, session_image_folder)
+            return render_template("index.html", success=True, **result)
 
-            return render_template(
-                "index.html",
-                mcq_path=mcq_filename,
-                ans_path=ans_filename,
-                success=True,
-                question_count=len(mcqs),
-                page_count=pages_requested,
-                image_count=total_images,
-                complexity_counts=complexity_counts
-            )
+        except GenerationError as e:
+            flash(str(e), "error")
+            return redirect(request.url)
 
         except Exception as e:
             flash(f"Error processing PDF: {e}", "error")
-            cleanup_temp_files(temp_file_path, session_image_folder)
             return redirect(request.url)
 
+        finally:
+            # Clean up temp files
+            cleanup_temp_files(temp_file_path, session_image_folder)
+
     return render_template("index.html", success=False)
 
 
-def add_image_references_to_mcqs(mcqs, images):
-    """Smart assignment of images only to questions that need them"""
-    if not images:
-        print("DEBUG: No images available")
-        return mcqs
+def run_job(job_id, temp_file_path, session_id, params):
+    """Background body of a submitted job"""
+    session_image_folder = os.path.join(TEMP_IMAGES_FOLDER, session_id)
+
+    def progress(stage, **details):
+        append_job_event(job_id, dict(details, stage=stage))
+
+    def should_cancel():
+        return is_cancel_requested(job_id)
+
+    try:
+        if should_cancel():
+            raise GenerationCancelled("Cancelled before start")
+
+        update_job(job_id, status="running")
+        progress("status", status="running")
+
+        result = generate_papers(temp_file_path, session_id, params, progress, should_cancel)
+        update_job(job_id, status="done", result=result)
+
+    except GenerationCancelled as e:
+        print(f"Job {job_id} cancelled: {e}")
+        update_job(job_id, status="cancelled", error="Job was cancelled.")
+
+    except Exception as e:
+        print(f"Job {job_id} failed: {e}")
+        update_job(job_id, status="failed", error=str(e))
+
+    finally:
+        untrack_job(job_id)
+        cleanup_temp_files(temp_file_path, session_image_folder)
+
+
+def submit_job():
+    """Accept an upload and queue it, returning immediately with a job id"""
+    pdf_file, error = validate_upload(request.files)
+    if error:
+        return jsonify({"error": error}), 400
+
+    try:
+        params = parse_generation_params(request.form)
+    except Exception as e:
+        return jsonify({"error": f"Invalid input values: {e}"}), 400
+
+    temp_file_path = os.path.join(UPLOAD_FOLDER, f"{uuid.uuid4()}.pdf")
+    session_id = uuid.uuid4().hex[:8]
+    pdf_file.save(temp_file_path)
+
+    job_id = create_job(params)
+    # Heartbeat while queued too, so a job waiting for a thread isn't expired
+    track_job(job_id)
+    get_job_executor().submit(run_job, job_id, temp_file_path, session_id, params)
+
+    return jsonify({
+        "job_id": job_id,
+        "status_url": url_for("job_status", job_id=job_id),
+        "events_url": url_for("job_events", job_id=job_id),
+        "cancel_url": url_for("cancel_job", job_id=job_id)
+    }), 202
+
 
-    print(f"DEBUG: Have {len(images)} images for {len(mcqs)} questions")
+def with_download_urls(job):
+    """Add download links to a finished job's result"""
+    if job["status"] == "done" and job["result"]:
+        job["result"]["mcq_url"] = url_for("download_file", filename=job["result"]["mcq_path"])
+        job["result"]["ans_url"] = url_for("download_file", filename=job["result"]["ans_path"])
+    return job
 
-    # Keywords indicating visual content
-    visual_keywords = [
-        'figure', 'diagram', 'graph', 'chart', 'table', 'image', 'picture',
-        'illustration', 'example', 'shown', 'following', 'given',
-        'tower', 'building', 'angle', 'triangle', 'circle', 'line'
-    ]
 
-    # Only assign images to questions with visual references
-    image_index = 0
-    assigned_count = 0
+def job_status(job_id):
+    """Job state as JSON; readable from any worker"""
+    job = load_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
 
-    for mcq in mcqs:
-        question_lower = mcq['question'].lower()
+    return jsonify(with_download_urls(job))
 
-        # Check if question mentions visual elements
-        has_visual_ref = any(keyword in question_lower for keyword in visual_keywords)
 
-        if has_visual_ref and image_index < len(images):
-            mcq['images'] = [images[image_index]]
-            print(f"DEBUG: Assigned {images[image_index]['filename']} to: {mcq['question'][:50]}...")
-            image_index += 1
-            assigned_count += 1
-        else:
-            mcq['images'] = []  # No image for non-visual questions
+def job_events(job_id):
+    """Server-Sent Events stream of a job's progress, ending with its final state.
 
-    print(f"DEBUG: {assigned_count} questions got images, {len(mcqs) - assigned_count} without images")
-    return mcqs
+    Events are read from the job's event log on disk, so the stream works
+    from any worker, not just the one running the job. Each response is
+    closed after MCQ_SSE_MAX_SECONDS so it doesn't hold a request thread for
+    the whole job; EventSource reconnects and resumes from Last-Event-ID,
+    the byte offset into the event log.
+    """
+    if load_job(job_id) is None:
+        return jsonify({"error": "Job not found."}), 404
+
+    poll_interval = float(os.getenv("MCQ_SSE_POLL_INTERVAL", 0.5))
+    max_seconds = float(os.getenv("MCQ_SSE_MAX_SECONDS", 20))
+
+    resume_from = request.headers.get("Last-Event-ID") or request.args.get("offset", "0")
+    try:
+        start_offset = max(0, int(resume_from))
+    except ValueError:
+        start_offset = 0
+
+    def format_events(events, offset):
+        # Only the last event of a batch carries the resume offset
+        for position, event in enumerate(events, 1):
+            event_id = f"id: {offset}\n" if position == len(events) else ""
+            yield f"{event_id}data: {json.dumps(event)}\n\n"
+
+    def stream():
+        offset = start_offset
+        started = last_sent = time.time()
+        yield "retry: 1000\n\n"
+
+        while time.time() - started < max_seconds:
+            events, offset = read_job_events(job_id, offset)
+            if events:
+                yield from format_events(events, offset)
+                last_sent = time.time()
+
+            # Stale jobs are marked failed here, so the stream always ends
+            job = load_job(job_id)
+            if job["status"] in FINISHED_STATUSES:
+                # Flush anything written between the read and the status check
+                events, offset = read_job_events(job_id, offset)
+                yield from format_events(events, offset)
+                yield f"event: {job['status']}\ndata: {json.dumps(with_download_urls(job))}\n\n"
+                return
+
+            # Comment line keeps proxies from closing an idle connection
+            if time.time() - last_sent > 15:
+                yield ": keep-alive\n\n"
+                last_sent = time.time()
+
+            time.sleep(poll_interval)
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def cancel_job(job_id):
+    """Ask a queued or running job to stop; no further LLM requests are sent"""
+    job = load_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found."}), 404
+
+    if job["status"] in FINISHED_STATUSES:
+        return jsonify({"status": job["status"]}), 409
+
+    request_cancel(job_id)
+    return jsonify({"status": "cancelling"}), 202
 
 
 def cleanup_temp_files(temp_file_path, session_image_folder):
@@ -214,7 +382,6 @@ def cleanup_temp_files(temp_file_path, session_image_folder):
         print(f"Error cleaning up: {e}")
 
 
-@app.route("/download/<filename>")
 def download_file(filename):
     """Secure file download handler"""
     try:
@@ -241,12 +408,41 @@ def download_file(filename):
         return redirect(url_for("index"))
 
 
-@app.errorhandler(413)
 def too_large(e):
-    flash("File too large. Please upload a smaller PDF.", "error")
+    message = "File too large. Please upload a smaller PDF."
+    # The job API is called from JavaScript, which expects JSON rather than a redirect
+    if request.path.startswith("/jobs"):
+        return jsonify({"error": message}), 413
+    flash(message, "error")
     return redirect(url_for("index"))
 
 
-if __name__ == "__main__":
+def create_app():
+    """Application factory used by both the dev server and WSGI servers"""
+    app = Flask(__name__)
+    app.secret_key = os.getenv("SECRET_KEY", "your-secret-key-change-this")
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB limit
+
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+    os.makedirs(TEMP_IMAGES_FOLDER, exist_ok=True)
+    os.makedirs(JOBS_FOLDER, exist_ok=True)
+    if DOC_INDEX_CACHE:
+        os.makedirs(INDEX_FOLDER, exist_ok=True)
+
+    app.add_url_rule("/", view_func=index, methods=["GET", "POST"])
+    app.add_url_rule("/jobs", view_func=submit_job, methods=["POST"])
+    app.add_url_rule("/jobs/<job_id>", view_func=job_status, methods=["GET"])
+    app.add_url_rule("/jobs/<job_id>/events", view_func=job_events, methods=["GET"])
+    app.add_url_rule("/jobs/<job_id>/cancel", view_func=cancel_job, methods=["POST"])
+    app.add_url_rule("/download/<filename>", view_func=download_file)
+    app.register_error_handler(413, too_large)
+
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
     app.run(debug=True, host="0.0.0.0", port=5000)
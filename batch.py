@@ -0,0 +1,294 @@
+"""Headless batch generation over directories or manifests of PDFs.
+
+Example:
+    python batch.py course_library/ --pages 10 --questions 20 --output-dir batch_output
+    python batch.py --manifest books.txt --workers 4 --llm-concurrency 8
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from mcq_core.doc_index import INDEX_FOLDER
+from mcq_core.models import LazyMCQFile
+from mcq_core.pipeline import (
+    extract_document,
+    generate_document_mcqs,
+    normalize_complexity_distribution,
+    write_document_outputs,
+)
+
+DEFAULT_OUTPUT_FOLDER = "batch_output"
+CHECKPOINT_FILENAME = "checkpoint.json"
+
+
+def collect_pdf_paths(inputs, manifest=None):
+    """Resolve directories, PDF files and an optional manifest into a sorted list of PDF paths"""
+    paths = []
+
+    if manifest:
+        with open(manifest, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    inputs.append(line)
+
+    for entry in inputs:
+        if os.path.isdir(entry):
+            for root, _, files in os.walk(entry):
+                for name in files:
+                    if name.lower().endswith(".pdf"):
+                        paths.append(os.path.join(root, name))
+        elif entry.lower().endswith(".pdf") and os.path.isfile(entry):
+            paths.append(entry)
+        else:
+            print(f"⚠️  Skipping {entry}: not a PDF file or directory")
+
+    # De-duplicate while keeping a stable order
+    return sorted({os.path.abspath(p) for p in paths})
+
+
+def document_id(pdf_path):
+    """Stable output folder name for a PDF path"""
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    digest = hashlib.sha1(pdf_path.encode("utf-8")).hexdigest()[:8]
+    return f"{stem}_{digest}"
+
+
+def load_checkpoint(checkpoint_path, params):
+    """Load the checkpoint file, or start a fresh one for ``params``.
+
+    Raises ValueError if the checkpoint was written with different
+    generation settings, since its completed outputs would not match them.
+    """
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        checkpoint.setdefault("completed", {})
+        checkpoint.setdefault("failed", {})
+
+        has_progress = checkpoint["completed"] or checkpoint["failed"]
+        if has_progress and checkpoint.get("params") != params:
+            raise ValueError(
+                f"Checkpoint {checkpoint_path} was created with different settings "
+                f"({checkpoint.get('params')}); use --restart or another --output-dir"
+            )
+        checkpoint["params"] = params
+        return checkpoint
+    return {"params": params, "completed": {}, "failed": {}}
+
+
+def save_checkpoint(checkpoint, checkpoint_path):
+    """Write the checkpoint atomically so an interrupted run never leaves it half-written"""
+    tmp_path = checkpoint_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, checkpoint_path)
+
+
+def outputs_intact(result):
+    """True if a checkpointed document's output files are still all there.
+
+    Only the JSONL header is read, so checking a large library is cheap.
+    """
+    try:
+        outputs = result["outputs"]
+        if not (os.path.isfile(outputs["mcq_pdf"]) and os.path.isfile(outputs["answer_pdf"])):
+            return False
+        return len(LazyMCQFile(outputs["jsonl"])) == result["questions"]
+    except (KeyError, TypeError, ValueError, OSError):
+        return False
+
+
+def generate_and_write(extraction_result, questions_requested, complexity_distribution, output_folder):
+    """Generation + rendering for one document, run on the LLM thread pool"""
+    mcqs = generate_document_mcqs(extraction_result, questions_requested, complexity_distribution)
+    if not mcqs:
+        raise RuntimeError("MCQ generation failed")
+
+    outputs = write_document_outputs(mcqs, output_folder)
+    if outputs is None:
+        raise RuntimeError("PDF rendering failed")
+
+    return {
+        "outputs": outputs,
+        "questions": len(mcqs),
+        "images": mcqs.image_count,
+        "complexity_counts": mcqs.complexity_counts,
+    }
+
+
+def run_batch(pdf_paths, output_dir, pages, questions, complexity_distribution,
+              workers=None, llm_concurrency=4, checkpoint_path=None, restart=False,
+              page_range=None, chapter=None, index_folder=INDEX_FOLDER):
+    """Run the extraction/generation pipeline over many PDFs.
+
+    Extraction is CPU bound and runs in a process pool; generation is bound by
+    the LLM API and runs in a thread pool of ``llm_concurrency`` documents, each
+    of which issues one LLM call at a time. New extractions are only started
+    while fewer than ``2 * llm_concurrency`` documents are in flight, so
+    extracted text and images don't pile up ahead of generation.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint_path = checkpoint_path or os.path.join(output_dir, CHECKPOINT_FILENAME)
+
+    params = {
+        "pages": pages,
+        "questions": questions,
+        "complexity_distribution": complexity_distribution,
+        "page_range": page_range,
+        "chapter": chapter,
+    }
+    if restart:
+        checkpoint = {"params": params, "completed": {}, "failed": {}}
+    else:
+        checkpoint = load_checkpoint(checkpoint_path, params)
+    todo = []
+    for pdf_path in pdf_paths:
+        result = checkpoint["completed"].get(pdf_path)
+        if result is None:
+            todo.append(pdf_path)
+        elif not outputs_intact(result):
+            print(f"⚠️  Outputs for {pdf_path} are missing or incomplete; regenerating")
+            todo.append(pdf_path)
+
+    skipped = len(pdf_paths) - len(todo)
+    if skipped:
+        print(f"⏭️  Resuming: {skipped} documents already completed")
+    print(f"📚 {len(todo)} documents to process")
+
+    stats = {"completed": 0, "failed": 0, "questions": 0}
+    started = time.time()
+
+    extract_workers = workers or os.cpu_count() or 1
+    max_in_flight = 2 * llm_concurrency
+    remaining = iter(todo)
+
+    with ProcessPoolExecutor(max_workers=extract_workers) as extract_pool, \
+            ThreadPoolExecutor(max_workers=llm_concurrency) as generate_pool:
+        pending = {}
+
+        def submit_extractions():
+            """Top up extractions without outrunning the generation pool"""
+            extracting = sum(1 for stage, _ in pending.values() if stage == "extract")
+            while len(pending) < max_in_flight and extracting < extract_workers:
+                pdf_path = next(remaining, None)
+                if pdf_path is None:
+                    return
+                image_folder = os.path.join(output_dir, document_id(pdf_path), "images")
+                future = extract_pool.submit(
+                    extract_document, pdf_path, pages, image_folder, page_range, chapter, index_folder
+                )
+                pending[future] = ("extract", pdf_path)
+                extracting += 1
+
+        submit_extractions()
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, pdf_path = pending.pop(future)
+                try:
+                    result = future.result()
+
+                    if stage == "extract":
+                        if not result["text"].strip():
+                            raise RuntimeError("No extractable text found in the PDF")
+                        doc_folder = os.path.join(output_dir, document_id(pdf_path))
+                        next_future = generate_pool.submit(
+                            generate_and_write, result, questions, complexity_distribution, doc_folder
+                        )
+                        pending[next_future] = ("generate", pdf_path)
+                        continue
+
+                    result["finished_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+                    checkpoint["completed"][pdf_path] = result
+                    checkpoint["failed"].pop(pdf_path, None)
+                    stats["completed"] += 1
+                    stats["questions"] += result["questions"]
+                    print(f"✅ {pdf_path}: {result['questions']} questions")
+
+                except Exception as e:
+                    checkpoint["failed"][pdf_path] = f"{stage}: {e}"
+                    stats["failed"] += 1
+                    print(f"❌ {pdf_path} ({stage}): {e}")
+
+                save_checkpoint(checkpoint, checkpoint_path)
+
+            submit_extractions()
+
+    elapsed = time.time() - started
+    stats["elapsed_seconds"] = elapsed
+    stats["documents_per_hour"] = stats["completed"] * 3600 / elapsed if elapsed > 0 else 0.0
+    return stats
+
+
+def print_throughput_report(stats):
+    """Print a summary of the run in documents per hour"""
+    print("\n📊 Batch Report:")
+    print(f"   ✅ Completed: {stats['completed']} documents")
+    print(f"   ❌ Failed: {stats['failed']} documents")
+    print(f"   📝 Questions: {stats['questions']}")
+    print(f"   ⏱️  Elapsed: {stats['elapsed_seconds']:.1f}s")
+    print(f"   🚀 Throughput: {stats['documents_per_hour']:.1f} documents/hour")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate MCQ papers for many PDFs without the web interface.")
+    parser.add_argument("inputs", nargs="*", help="PDF files or directories to scan for PDFs")
+    parser.add_argument("--manifest", help="Text file listing one PDF path per line")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_FOLDER, help="Where per-document outputs are written")
+    parser.add_argument("--pages", type=int, default=2, help="Pages to extract per document (1-50)")
+    parser.add_argument("--page-range", help="Pages to use instead of the first --pages, e.g. '45-60,72'")
+    parser.add_argument("--chapter", help="TOC chapter to use: title text or chapter number")
+    parser.add_argument("--index-dir", default=INDEX_FOLDER, help="Where per-document page indexes are cached")
+    parser.add_argument("--questions", type=int, default=10, help="Questions per document (5-50)")
+    parser.add_argument("--low", type=int, default=40, help="Easy question percentage")
+    parser.add_argument("--medium", type=int, default=40, help="Medium question percentage")
+    parser.add_argument("--hard", type=int, default=20, help="Hard question percentage")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="Documents generating against the LLM at once")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output-dir>/checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and process everything")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    # Only the CLI entry point needs .env loading
+    from dotenv import load_dotenv
+    load_dotenv()
+    args = parse_args(argv)
+
+    pdf_paths = collect_pdf_paths(list(args.inputs), args.manifest)
+    if not pdf_paths:
+        print("No PDF files found.")
+        return 1
+
+    try:
+        stats = run_batch(
+            pdf_paths,
+            output_dir=args.output_dir,
+            pages=max(1, min(args.pages, 50)),
+            questions=max(5, min(args.questions, 50)),
+            complexity_distribution=normalize_complexity_distribution(args.low, args.medium, args.hard),
+            workers=args.workers,
+            llm_concurrency=max(1, args.llm_concurrency),
+            checkpoint_path=args.checkpoint,
+            restart=args.restart,
+            page_range=args.page_range,
+            chapter=args.chapter,
+            index_folder=args.index_dir,
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print_throughput_report(stats)
+    return 0 if stats["failed"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
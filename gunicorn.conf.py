@@ -0,0 +1,28 @@
+"""Production serving config.
+
+    gunicorn -c gunicorn.conf.py "app:create_app()"
+
+Overridable through the environment: WEB_CONCURRENCY (worker processes),
+GUNICORN_THREADS (request threads per worker), PORT.
+"""
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+# Open progress streams each hold a thread for up to MCQ_SSE_MAX_SECONDS
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+
+# Generation runs in background job threads, but the synchronous form
+# route still waits for the LLM, so allow long requests.
+timeout = 300
+graceful_timeout = 30
+keepalive = 5
+
+# Workers divide the OPENAI_MAX_RPM budget between them (see mcq_core/llm_client.py)
+raw_env = [f"WEB_CONCURRENCY={workers}"]
+
+accesslog = "-"
+errorlog = "-"
@@ -0,0 +1,105 @@
+"""Local load test for the job API.
+
+Start the server against the stub LLM, then submit jobs concurrently:
+
+    MCQ_LLM_STUB=1 WEB_CONCURRENCY=4 gunicorn -c gunicorn.conf.py "app:create_app()"
+    python loadtest.py sample.pdf --jobs 40 --concurrency 8
+
+Repeat with different WEB_CONCURRENCY values to compare throughput.
+"""
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def encode_multipart(fields, file_field, filename, file_bytes):
+    """Build a multipart/form-data body without third-party packages"""
+    boundary = uuid.uuid4().hex
+    lines = []
+    for name, value in fields.items():
+        lines.append(f"--{boundary}\r\nContent-Disposition: form-data; name=\"{name}\"\r\n\r\n{value}\r\n".encode())
+    lines.append(
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"{file_field}\"; filename=\"{filename}\"\r\n"
+        f"Content-Type: application/pdf\r\n\r\n".encode()
+    )
+    lines.append(file_bytes)
+    lines.append(f"\r\n--{boundary}--\r\n".encode())
+    return b"".join(lines), f"multipart/form-data; boundary={boundary}"
+
+
+def run_one(base_url, body, content_type, poll_interval, counter, timeout=600):
+    """Submit one job and poll until it finishes; returns (status, seconds).
+
+    Gives up with status "timeout" after ``timeout`` seconds.
+    """
+    started = time.time()
+    submit = urllib.request.Request(f"{base_url}/jobs", data=body, headers={"Content-Type": content_type})
+    with urllib.request.urlopen(submit) as response:
+        job = json.load(response)
+    counter.add()
+
+    while True:
+        time.sleep(poll_interval)
+        with urllib.request.urlopen(f"{base_url}{job['status_url']}") as response:
+            state = json.load(response)
+        counter.add()
+        if state["status"] in ("done", "failed", "cancelled"):
+            return state["status"], time.time() - started
+        if time.time() - started > timeout:
+            return "timeout", time.time() - started
+
+
+class RequestCounter:
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def add(self):
+        with self.lock:
+            self.count += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the MCQ job API.")
+    parser.add_argument("pdf", help="PDF to upload for every job")
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=2)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--poll-interval", type=float, default=0.25)
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds before giving up on one job")
+    args = parser.parse_args(argv)
+
+    with open(args.pdf, "rb") as f:
+        body, content_type = encode_multipart(
+            {"pages": args.pages, "questions": args.questions},
+            "pdf", "loadtest.pdf", f.read()
+        )
+
+    counter = RequestCounter()
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(
+            lambda _: run_one(args.url, body, content_type, args.poll_interval, counter, args.timeout),
+            range(args.jobs)
+        ))
+    elapsed = time.time() - started
+
+    done = sum(1 for status, _ in results if status == "done")
+    timed_out = sum(1 for status, _ in results if status == "timeout")
+    latencies = sorted(seconds for _, seconds in results)
+
+    print(f"Jobs: {done}/{args.jobs} done in {elapsed:.1f}s ({timed_out} timed out)")
+    print(f"Throughput: {done / elapsed:.2f} jobs/s, {counter.count / elapsed:.1f} requests/s")
+    print(f"Latency: median {latencies[len(latencies) // 2]:.2f}s, max {latencies[-1]:.2f}s")
+    return 0 if done == args.jobs else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
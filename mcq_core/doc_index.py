@@ -0,0 +1,269 @@
+import os
+import re
+import json
+import time
+import hashlib
+import tempfile
+
+INDEX_FOLDER = "doc_index"
+
+# The cache keeps each document's full text, so bound how much and how long
+INDEX_MAX_BYTES = int(float(os.getenv("MCQ_DOC_INDEX_MAX_MB", 1024)) * 1024 * 1024)
+INDEX_MAX_AGE_SECONDS = float(os.getenv("MCQ_DOC_INDEX_MAX_AGE_DAYS", 30)) * 24 * 3600
+
+# Same ceiling as the "pages" form field, applied to ranges and chapters too
+MAX_SELECTED_PAGES = 50
+
+
+def hash_file(file_path):
+    """SHA-256 of the file contents, used as the index key"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomic(path, data, mode="w"):
+    # Unique temp file per writer: concurrent first uploads of one book may race here
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", suffix=".tmp")
+    with os.fdopen(fd, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+        f.write(data)
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # Another writer got there first with identical content-addressed data
+        if not os.path.exists(path):
+            raise
+        os.remove(tmp_path)
+
+
+def _scan_document(file_path, include_text):
+    """One pass over the PDF: page image xrefs, TOC and optionally page text"""
+    import fitz  # PyMuPDF
+
+    pages = []
+    text_blocks = []
+    image_sources = {}
+    offset = 0
+
+    with fitz.open(file_path) as doc:
+        for page_num in range(len(doc)):
+            page = doc[page_num]
+            xrefs = [img[0] for img in page.get_images(full=True)]
+
+            for xref in xrefs:
+                image_sources.setdefault(str(xref), page_num + 1)
+
+            entry = {"image_xrefs": xrefs}
+            if include_text:
+                page_bytes = page.get_text().encode("utf-8")
+                entry.update(offset=offset, length=len(page_bytes))
+                text_blocks.append(page_bytes)
+                offset += len(page_bytes)
+            pages.append(entry)
+
+        toc = [
+            {"level": level, "title": title, "page": page}
+            for level, title, page, *_ in doc.get_toc()
+        ]
+
+    index = {
+        "page_count": len(pages),
+        "pages": pages,
+        "toc": toc,
+        "image_sources": image_sources
+    }
+    return index, text_blocks
+
+
+def build_document_index(file_path, index_folder=INDEX_FOLDER):
+    """Return the page index for a PDF, scanning the document only the first time.
+
+    The index is keyed by content hash, so re-uploads of the same book reuse
+    it. It records, per page, the byte offset of its text in a side file and
+    the image xrefs on it, plus the TOC and the first page each image
+    appears on. With ``index_folder=None`` nothing is written to disk: the
+    index has no cached text and lives only for this call's result.
+    """
+    if index_folder is None:
+        index, _ = _scan_document(file_path, include_text=False)
+        return index
+
+    os.makedirs(index_folder, exist_ok=True)
+
+    content_hash = hash_file(file_path)
+    index_path = os.path.join(index_folder, f"{content_hash}.json")
+    text_path = os.path.join(index_folder, f"{content_hash}.txt")
+
+    if os.path.exists(index_path) and os.path.exists(text_path):
+        print(f"📇 Using cached index {content_hash[:12]}")
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        # Mark as recently used for prune_index_cache
+        os.utime(index_path)
+        index["text_path"] = text_path
+        return index
+
+    print(f"📇 Building index {content_hash[:12]} for {file_path}")
+    index, text_blocks = _scan_document(file_path, include_text=True)
+    index["hash"] = content_hash
+
+    # Text first, so an index file never points at missing text
+    _write_atomic(text_path, b"".join(text_blocks), mode="wb")
+    _write_atomic(index_path, json.dumps(index))
+
+    prune_index_cache(index_folder, keep=content_hash)
+
+    index["text_path"] = text_path
+    return index
+
+
+def _cache_entry_size(index_folder, content_hash):
+    paths = [os.path.join(index_folder, content_hash + suffix) for suffix in (".json", ".txt")]
+    return sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+
+def prune_index_cache(index_folder=INDEX_FOLDER, max_bytes=None, max_age_seconds=None, keep=None):
+    """Evict cached indexes unused for ``max_age_seconds``, then least recently
+    used ones until the cache fits in ``max_bytes``. Returns the evicted hashes.
+    """
+    max_bytes = INDEX_MAX_BYTES if max_bytes is None else max_bytes
+    max_age_seconds = INDEX_MAX_AGE_SECONDS if max_age_seconds is None else max_age_seconds
+
+    cutoff = time.time() - max_age_seconds
+    entries = []
+    for name in os.listdir(index_folder):
+        content_hash, ext = os.path.splitext(name)
+        path = os.path.join(index_folder, name)
+        if ext == ".txt" and not os.path.exists(os.path.join(index_folder, content_hash + ".json")):
+            # Text left behind by a writer killed before it wrote the index
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+            continue
+        if ext != ".json" or content_hash == keep:
+            continue
+        try:
+            last_used = os.path.getmtime(path)
+            entries.append((last_used, _cache_entry_size(index_folder, content_hash), content_hash))
+        except OSError:
+            # Evicted by another worker while we were listing
+            continue
+
+    total = sum(size for _, size, _ in entries)
+    if keep:
+        total += _cache_entry_size(index_folder, keep)
+
+    evicted = []
+    for last_used, size, content_hash in sorted(entries):
+        if last_used >= cutoff and total <= max_bytes:
+            break
+        # Index first, so a reader never finds an index without its text
+        for suffix in (".json", ".txt"):
+            try:
+                os.remove(os.path.join(index_folder, content_hash + suffix))
+            except FileNotFoundError:
+                pass
+        total -= size
+        evicted.append(content_hash)
+
+    if evicted:
+        print(f"🧹 Evicted {len(evicted)} cached document indexes")
+    return evicted
+
+
+def read_pages_text(index, page_numbers):
+    """Read cached text for 0-based page numbers without opening the PDF"""
+    texts = []
+    with open(index["text_path"], "rb") as f:
+        for page_num in page_numbers:
+            entry = index["pages"][page_num]
+            f.seek(entry["offset"])
+            texts.append(f.read(entry["length"]).decode("utf-8"))
+    return texts
+
+
+def parse_page_range(page_range, page_count):
+    """Parse '5-9, 12' (1-based, inclusive) into sorted 0-based page numbers"""
+    selected = set()
+
+    for part in page_range.split(","):
+        part = part.strip()
+        if not part:
+            continue
+
+        match = re.fullmatch(r'(\d+)\s*(?:-\s*(\d+))?', part)
+        if not match:
+            raise ValueError(f"Invalid page range: {part}")
+
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else start
+        if start < 1 or end < start:
+            raise ValueError(f"Invalid page range: {part}")
+
+        selected.update(range(start - 1, min(end, page_count)))
+
+    return sorted(selected)
+
+
+def find_chapter_pages(index, chapter):
+    """0-based pages of a TOC entry, matched by title or by chapter number.
+
+    A number first matches a numbered title ("7 ...", "Chapter 7: ..."); only
+    if none exists is it taken as the nth top-level entry, since front matter
+    (Cover, Preface, ...) usually comes first.
+    """
+    toc = [entry for entry in index["toc"] if entry["page"] > 0]
+    chapter = str(chapter).strip()
+
+    position = None
+    if chapter.isdigit():
+        numbered = re.compile(rf'^(chapter\s+)?0*{int(chapter)}\b', re.IGNORECASE)
+        for i, entry in enumerate(toc):
+            if numbered.match(entry["title"].strip()):
+                position = i
+                break
+        else:
+            top_level = [i for i, entry in enumerate(toc) if entry["level"] == 1]
+            if 1 <= int(chapter) <= len(top_level):
+                position = top_level[int(chapter) - 1]
+    else:
+        for i, entry in enumerate(toc):
+            if chapter.lower() in entry["title"].lower():
+                position = i
+                break
+
+    if position is None:
+        raise ValueError(f"Chapter not found in table of contents: {chapter}")
+
+    entry = toc[position]
+    end_page = index["page_count"]
+    for following in toc[position + 1:]:
+        if following["level"] <= entry["level"]:
+            end_page = max(entry["page"], following["page"] - 1)
+            break
+
+    return list(range(entry["page"] - 1, end_page))
+
+
+def resolve_page_selection(index, page_range=None, chapter=None, max_pages=2):
+    """Pages to extract: an explicit range, a chapter, or else the first max_pages.
+
+    Raises ValueError if a range or chapter covers more than MAX_SELECTED_PAGES.
+    """
+    if page_range:
+        pages = parse_page_range(page_range, index["page_count"])
+    elif chapter:
+        pages = find_chapter_pages(index, chapter)
+    else:
+        return list(range(min(max_pages, MAX_SELECTED_PAGES, index["page_count"])))
+
+    if len(pages) > MAX_SELECTED_PAGES:
+        raise ValueError(
+            f"Selection covers {len(pages)} pages; at most {MAX_SELECTED_PAGES} pages "
+            f"can be used per request. Please narrow the page range."
+        )
+    return pages
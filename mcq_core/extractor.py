@@ -1,11 +1,21 @@
-import fitz  # PyMuPDF
 import os
-from PIL import Image
 import shutil
 
+from mcq_core.doc_index import read_pages_text
 
-def extract_text_and_images_from_pdf(file_path, max_pages=2, output_folder="temp_images"):
-    """Enhanced extractor with proper image-to-page mapping and transparency handling"""
+
+def extract_text_and_images_from_pdf(file_path, max_pages=2, output_folder="temp_images", pages=None, doc_index=None,
+                                     progress=None):
+    """Enhanced extractor with proper image-to-page mapping and transparency handling
+
+    ``pages`` selects 0-based pages to extract instead of the first ``max_pages``.
+    With a ``doc_index`` (see mcq_core.doc_index) the full-document image scan
+    is skipped, and page text is read from the index cache when it has one. ``progress(stage,
+    **details)`` is called after each page.
+    """
+    # Heavy dependencies are imported on first use to keep app start-up fast
+    import fitz  # PyMuPDF
+    from PIL import Image
 
     print(f"🔍 Extracting from: {file_path}")
     print(f"📁 Output folder: {output_folder}")
@@ -24,27 +34,45 @@ def extract_text_and_images_from_pdf(file_path, max_pages=2, output_folder="temp
 
     try:
         with fitz.open(file_path) as doc:
-            # Pass 1: Map ALL images to their true source pages
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                image_list = page.get_images(full=True)
-                for img in image_list:
-                    xref = img[0]
-                    if xref not in page_image_map:
-                        page_image_map[xref] = {
-                            'source_page': page_num + 1,
-                            'source_page_index': page_num
-                        }
+            if doc_index is not None:
+                # Pass 1 was done once when the index was built
+                for xref, source_page in doc_index["image_sources"].items():
+                    page_image_map[int(xref)] = {
+                        'source_page': source_page,
+                        'source_page_index': source_page - 1
+                    }
+            else:
+                # Pass 1: Map ALL images to their true source pages
+                for page_num in range(len(doc)):
+                    page = doc[page_num]
+                    image_list = page.get_images(full=True)
+                    for img in image_list:
+                        xref = img[0]
+                        if xref not in page_image_map:
+                            page_image_map[xref] = {
+                                'source_page': page_num + 1,
+                                'source_page_index': page_num
+                            }
 
             # Pass 2: Extract text and images from specified pages
-            pages_to_extract = min(max_pages, len(doc))
+            if pages is None:
+                pages_to_extract = list(range(min(max_pages, len(doc))))
+            else:
+                pages_to_extract = [page_num for page_num in pages if 0 <= page_num < len(doc)]
+
+            cached_texts = {}
+            if doc_index is not None and "text_path" in doc_index:
+                cached_texts = dict(zip(pages_to_extract, read_pages_text(doc_index, pages_to_extract)))
 
-            for page_num in range(pages_to_extract):
+            for done_count, page_num in enumerate(pages_to_extract, 1):
                 print(f"\n--- Processing Page {page_num + 1} ---")
                 page = doc[page_num]
 
                 # Extract text
-                page_text = page.get_text()
+                if page_num in cached_texts:
+                    page_text = cached_texts[page_num]
+                else:
+                    page_text = page.get_text()
                 if page_text.strip():
                     text += f"\n--- Page {page_num + 1} ---\n{page_text}\n"
                     print(f"✅ Extracted {len(page_text)} characters of text")
@@ -142,6 +170,10 @@ def extract_text_and_images_from_pdf(file_path, max_pages=2, output_folder="temp
                         print(f"    ❌ Error: {e}")
                         continue
 
+                if progress:
+                    progress("extract", page=page_num + 1, done=done_count, pages=len(pages_to_extract),
+                             images=len(images))
+
         print(f"\n🎯 Final Results:")
         print(f"   📝 Text: {len(text)} characters")
         print(f"   🖼️  Images: {len(images)}")
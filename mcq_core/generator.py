@@ -1,9 +1,11 @@
-import openai
-import os
 import re
 import math
 
-openai.api_key = os.getenv("OPENAI_API_KEY")
+from mcq_core.llm_client import chat_completion
+
+
+class GenerationCancelled(Exception):
+    """Raised when a caller's should_cancel() asks generation to stop"""
 
 
 def split_text_into_chunks(text, max_words=600):
@@ -16,8 +18,13 @@ def split_text_into_chunks(text, max_words=600):
     return chunks
 
 
-def generate_mcqs(text, total_questions=25, complexity_distribution=None):
-    """Generate MCQs with accurate count and complexity distribution"""
+def generate_mcqs(text, total_questions=25, complexity_distribution=None, progress=None, should_cancel=None):
+    """Generate MCQs with accurate count and complexity distribution
+
+    ``progress(stage, **details)`` is called after every LLM chunk call with
+    the running question count; ``should_cancel()`` is checked before each
+    call and raises GenerationCancelled so no further requests are sent.
+    """
     if not text.strip():
         return []
 
@@ -47,17 +54,27 @@ def generate_mcqs(text, total_questions=25, complexity_distribution=None):
         ("hard", hard_count)
     ]
 
+    def report_chunk(complexity, chunk, chunk_count, questions):
+        if progress:
+            progress("generate", complexity=complexity, chunk=chunk, chunks=chunk_count,
+                     questions=len(all_mcqs) + questions, target=total_questions)
+
     for complexity, count in complexity_levels:
         if count <= 0:
             continue
-        questions = generate_questions_by_complexity(chunks, count, complexity)
+        questions = generate_questions_by_complexity(
+            chunks, count, complexity, on_chunk=report_chunk, should_cancel=should_cancel
+        )
         all_mcqs.extend(questions)
 
     return all_mcqs[:total_questions]
 
 
-def generate_questions_by_complexity(chunks, question_count, complexity):
-    """Generate questions for specific complexity level"""
+def generate_questions_by_complexity(chunks, question_count, complexity, on_chunk=None, should_cancel=None):
+    """Generate questions for specific complexity level
+
+    ``on_chunk(complexity, chunk, chunks, questions_so_far)`` runs after each LLM call.
+    """
     questions = []
     questions_per_chunk = max(1, question_count // len(chunks))
     remaining_questions = question_count
@@ -82,6 +99,9 @@ def generate_questions_by_complexity(chunks, question_count, complexity):
         if current_questions <= 0:
             continue
 
+        if should_cancel and should_cancel():
+            raise GenerationCancelled(f"Cancelled during {complexity} questions")
+
         prompt = f"""Create {current_questions} {complexity} difficulty multiple choice questions from this text.
 
 {complexity_instructions[complexity]}
@@ -105,14 +125,7 @@ Requirements:
 - Base questions strictly on the provided text"""
 
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=2500
-            )
-
-            content = response['choices'][0]['message']['content']
+            content = chat_completion(prompt, model="gpt-3.5-turbo", temperature=0.7, max_tokens=2500)
             chunk_questions = parse_ai_response(content, complexity)
 
             chunk_questions = chunk_questions[:current_questions]
@@ -121,7 +134,9 @@ Requirements:
 
         except Exception as e:
             print(f"Error generating {complexity} questions: {e}")
-            continue
+
+        if on_chunk:
+            on_chunk(complexity, i + 1, len(chunks), len(questions))
 
     return questions
 
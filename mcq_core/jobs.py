@@ -0,0 +1,229 @@
+import os
+import re
+import json
+import time
+import uuid
+import tempfile
+import threading
+
+JOBS_FOLDER = "jobs"
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+
+# A queued/running job whose worker hasn't touched it for this long is marked failed
+JOB_STALE_SECONDS = float(os.getenv("MCQ_JOB_STALE_SECONDS", 120))
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("MCQ_JOB_HEARTBEAT_INTERVAL", 10))
+
+# Finished jobs (state, event log, cancel marker) are deleted after this long
+JOB_TTL_SECONDS = float(os.getenv("MCQ_JOB_TTL_SECONDS", 24 * 3600))
+JOB_PURGE_INTERVAL = 300
+
+_JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# Serializes read-modify-write of job files within this process
+_job_lock = threading.RLock()
+
+# Jobs owned by this process: {job_id: jobs_folder}
+_active_jobs = {}
+_heartbeat_thread = None
+_last_purge = 0.0
+
+
+def _job_path(job_id, jobs_folder=JOBS_FOLDER, suffix=".json"):
+    if not _JOB_ID_PATTERN.match(job_id or ""):
+        raise ValueError(f"Invalid job id: {job_id}")
+    return os.path.join(jobs_folder, f"{job_id}{suffix}")
+
+
+def _write_job(job, jobs_folder=JOBS_FOLDER):
+    """Write job state atomically so readers in other workers never see a partial file"""
+    path = _job_path(job["id"], jobs_folder)
+    # Unique per writer: threads of one process must not share a temp file
+    fd, tmp_path = tempfile.mkstemp(dir=jobs_folder, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(job, f)
+    os.replace(tmp_path, path)
+
+
+def create_job(params, jobs_folder=JOBS_FOLDER):
+    """Record a new queued job and return its id.
+
+    Job state lives on disk rather than in memory so that any serving worker
+    can answer status requests for a job running in another worker.
+    """
+    os.makedirs(jobs_folder, exist_ok=True)
+    _maybe_purge_expired_jobs(jobs_folder)
+    job = {
+        "id": uuid.uuid4().hex,
+        "status": "queued",
+        "created_at": time.time(),
+        "updated_at": time.time(),
+        "params": params,
+        "result": None,
+        "error": None,
+    }
+    _write_job(job, jobs_folder)
+    return job["id"]
+
+
+def _read_job(job_id, jobs_folder=JOBS_FOLDER):
+    try:
+        path = _job_path(job_id, jobs_folder)
+    except ValueError:
+        return None
+
+    if not os.path.exists(path):
+        return None
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def is_job_stale(job):
+    """True if an unfinished job has missed its heartbeats (its worker likely died)"""
+    return (job["status"] not in FINISHED_STATUSES
+            and time.time() - job["updated_at"] > JOB_STALE_SECONDS)
+
+
+def load_job(job_id, jobs_folder=JOBS_FOLDER):
+    """Return the job state, or None if the id is unknown or malformed.
+
+    A stale queued/running job is marked failed here, so pollers always
+    reach a finished status even if the worker running it was killed.
+    """
+    job = _read_job(job_id, jobs_folder)
+    if job is not None and is_job_stale(job):
+        print(f"Job {job_id} stopped responding; marking it failed")
+        job = update_job(job_id, jobs_folder, status="failed",
+                         error="Job stopped responding (worker restarted?). Please try again.")
+    return job
+
+
+def purge_expired_jobs(jobs_folder=JOBS_FOLDER, ttl_seconds=None):
+    """Delete the files of jobs finished more than ``ttl_seconds`` ago; returns how many"""
+    ttl_seconds = JOB_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    cutoff = time.time() - ttl_seconds
+    purged = 0
+
+    for name in os.listdir(jobs_folder):
+        job_id, suffix = name[:32], name[32:]
+        path = os.path.join(jobs_folder, name)
+        try:
+            if suffix == ".json" and _JOB_ID_PATTERN.match(job_id):
+                job = load_job(job_id, jobs_folder)
+                if job is None or job["status"] not in FINISHED_STATUSES or job["updated_at"] > cutoff:
+                    continue
+                for extra in (".events.jsonl", ".cancel", ".json"):
+                    extra_path = _job_path(job_id, jobs_folder, extra)
+                    if os.path.exists(extra_path):
+                        os.remove(extra_path)
+                purged += 1
+            elif name.endswith((".events.jsonl", ".cancel", ".tmp")) and os.path.getmtime(path) < cutoff:
+                # Leftovers whose job file is gone, or temp files from a killed writer
+                if not os.path.exists(os.path.join(jobs_folder, f"{job_id}.json")):
+                    os.remove(path)
+        except (OSError, ValueError) as e:
+            # Another worker may be purging the same files
+            print(f"Could not purge {name}: {e}")
+
+    return purged
+
+
+def _maybe_purge_expired_jobs(jobs_folder):
+    global _last_purge
+    if time.time() - _last_purge < JOB_PURGE_INTERVAL:
+        return
+    _last_purge = time.time()
+    purged = purge_expired_jobs(jobs_folder)
+    if purged:
+        print(f"🧹 Purged {purged} expired jobs")
+
+
+def update_job(job_id, jobs_folder=JOBS_FOLDER, **fields):
+    """Merge fields into the stored job state"""
+    with _job_lock:
+        job = _read_job(job_id, jobs_folder)
+        if job is None:
+            return None
+
+        job.update(fields)
+        job["updated_at"] = time.time()
+        _write_job(job, jobs_folder)
+        return job
+
+
+def _heartbeat_loop():
+    while True:
+        time.sleep(JOB_HEARTBEAT_INTERVAL)
+        with _job_lock:
+            active = list(_active_jobs.items())
+            for job_id, jobs_folder in active:
+                try:
+                    job = _read_job(job_id, jobs_folder)
+                    if job is not None and job["status"] not in FINISHED_STATUSES:
+                        update_job(job_id, jobs_folder)
+                except Exception as e:
+                    print(f"Heartbeat failed for job {job_id}: {e}")
+
+
+def track_job(job_id, jobs_folder=JOBS_FOLDER):
+    """Keep refreshing a job's updated_at while this process owns it"""
+    global _heartbeat_thread
+    with _job_lock:
+        _active_jobs[job_id] = jobs_folder
+        if _heartbeat_thread is None:
+            _heartbeat_thread = threading.Thread(target=_heartbeat_loop, name="job-heartbeat", daemon=True)
+            _heartbeat_thread.start()
+
+
+def untrack_job(job_id):
+    with _job_lock:
+        _active_jobs.pop(job_id, None)
+
+
+def append_job_event(job_id, event, jobs_folder=JOBS_FOLDER):
+    """Append a progress event to the job's event log (one JSON object per line)"""
+    event = dict(event, time=time.time())
+    with open(_job_path(job_id, jobs_folder, ".events.jsonl"), "a", encoding="utf-8") as f:
+        f.write(json.dumps(event) + "\n")
+
+
+def read_job_events(job_id, offset=0, jobs_folder=JOBS_FOLDER):
+    """Return (events, new_offset) for events appended since ``offset`` bytes.
+
+    ``offset`` may come from a client (SSE Last-Event-ID), so one that isn't
+    at the start of a line is moved to the next line, and one past the end
+    of the log restarts from the beginning.
+    """
+    path = _job_path(job_id, jobs_folder, ".events.jsonl")
+    if not os.path.exists(path):
+        return [], offset
+
+    events = []
+    with open(path, "rb") as f:
+        if offset > os.fstat(f.fileno()).st_size:
+            offset = 0
+        if offset > 0:
+            f.seek(offset - 1)
+            if f.read(1) != b"\n":
+                rest = f.readline()
+                if not rest.endswith(b"\n"):
+                    return [], offset
+                offset += len(rest)
+        f.seek(offset)
+        for line in f:
+            # A line without its newline is still being written
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            events.append(json.loads(line))
+    return events, offset
+
+
+def request_cancel(job_id, jobs_folder=JOBS_FOLDER):
+    """Ask a job to stop; the worker running it checks for the marker file"""
+    with open(_job_path(job_id, jobs_folder, ".cancel"), "w", encoding="utf-8") as f:
+        f.write(str(time.time()))
+
+
+def is_cancel_requested(job_id, jobs_folder=JOBS_FOLDER):
+    return os.path.exists(_job_path(job_id, jobs_folder, ".cancel"))
@@ -0,0 +1,146 @@
+import os
+import re
+import time
+import warnings
+import threading
+
+# Shared, lazily created state for this worker process
+_openai = None
+_client_lock = threading.Lock()
+_rate_limiter = None
+_concurrency = None
+
+
+class RateLimiter:
+    """Token bucket limiting LLM requests per minute within one process.
+
+    The global budget (OPENAI_MAX_RPM) is split evenly across the serving
+    workers (WEB_CONCURRENCY) so that all workers together stay under it
+    without needing shared state between processes.
+    """
+
+    def __init__(self, requests_per_minute):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_seconds = (1 - self.tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+def _worker_count():
+    try:
+        return max(1, int(os.getenv("WEB_CONCURRENCY", 1)))
+    except ValueError:
+        return 1
+
+
+def _get_openai():
+    """Import and configure the OpenAI client on first use, with a pooled HTTP session"""
+    global _openai
+    if _openai is None:
+        with _client_lock:
+            if _openai is None:
+                import openai
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                class SharedPoolAdapter(HTTPAdapter):
+                    """Connection pool shared by every thread's session for the life of the process"""
+
+                    def close(self):
+                        # The legacy client closes each thread's session when it expires;
+                        # that must not tear down connections other threads are using.
+                        pass
+
+                pool_size = int(os.getenv("OPENAI_POOL_SIZE", 10))
+                # Same connection retries as the legacy client's own adapter
+                adapter = SharedPoolAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=2)
+
+                def make_session():
+                    # A factory bypasses the legacy client's own session setup, so
+                    # apply the same openai.proxy / verify_ssl_certs handling here
+                    if not openai.verify_ssl_certs:
+                        warnings.warn("verify_ssl_certs is ignored; openai always verifies.")
+                    session = requests.Session()
+                    if isinstance(openai.proxy, str):
+                        session.proxies = {"http": openai.proxy, "https": openai.proxy}
+                    elif isinstance(openai.proxy, dict):
+                        session.proxies = openai.proxy.copy()
+                    elif openai.proxy is not None:
+                        raise ValueError("'openai.proxy' must be specified as either a 'str' or 'dict'")
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    return session
+
+                openai.api_key = os.getenv("OPENAI_API_KEY")
+                # Per-thread sessions from a factory, all reusing one keep-alive pool
+                # instead of a new TLS handshake per call
+                openai.requestssession = make_session
+                _openai = openai
+    return _openai
+
+
+def _get_limits():
+    """Per-process rate limiter and concurrency cap, derived from the environment"""
+    global _rate_limiter, _concurrency
+    if _concurrency is None:
+        with _client_lock:
+            if _concurrency is None:
+                max_rpm = os.getenv("OPENAI_MAX_RPM")
+                if max_rpm:
+                    _rate_limiter = RateLimiter(max(1.0, float(max_rpm) / _worker_count()))
+                _concurrency = threading.BoundedSemaphore(int(os.getenv("OPENAI_MAX_CONCURRENCY", 8)))
+    return _rate_limiter, _concurrency
+
+
+def _stub_completion(prompt):
+    """Canned response in the generator's question format, for local load testing"""
+    time.sleep(float(os.getenv("MCQ_LLM_STUB_LATENCY", 0.5)))
+
+    match = re.search(r'Create (\d+)', prompt)
+    count = int(match.group(1)) if match else 1
+
+    blocks = []
+    for i in range(1, count + 1):
+        blocks.append(
+            f"Question {i}: Which statement about stub topic {i} is correct?\n"
+            f"A) First statement\nB) Second statement\nC) Third statement\nD) Fourth statement\n"
+            f"Answer: A\n"
+            f"Explanation: The stub LLM always marks the first statement as correct."
+        )
+    return "\n\n".join(blocks)
+
+
+def chat_completion(prompt, model="gpt-3.5-turbo", temperature=0.7, max_tokens=2500):
+    """Send a single-message chat completion and return the response text.
+
+    Set MCQ_LLM_STUB=1 to answer from a local stub instead of the API.
+    """
+    rate_limiter, concurrency = _get_limits()
+
+    if rate_limiter is not None:
+        rate_limiter.acquire()
+
+    with concurrency:
+        if os.getenv("MCQ_LLM_STUB") == "1":
+            return _stub_completion(prompt)
+
+        response = _get_openai().ChatCompletion.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        return response['choices'][0]['message']['content']
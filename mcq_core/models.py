@@ -0,0 +1,235 @@
+import json
+from array import array
+
+COMPLEXITY_LEVELS = ("easy", "medium", "hard")
+ANSWER_LETTERS = "ABCD"
+
+_COMPLEXITY_CODES = {level: code for code, level in enumerate(COMPLEXITY_LEVELS)}
+_DEFAULT_COMPLEXITY = _COMPLEXITY_CODES["medium"]
+
+# First line of a JSONL file; lets readers get counts without parsing records
+_HEADER_KEY = "mcq_batch"
+_FORMAT_VERSION = 1
+
+
+class MCQ:
+    """A single multiple choice question"""
+
+    __slots__ = ("question", "options", "answer", "explanation", "complexity", "images")
+
+    def __init__(self, question, options, answer, explanation="", complexity="medium", images=()):
+        self.question = question
+        self.options = tuple(options)
+        self.answer = answer
+        self.explanation = explanation
+        self.complexity = complexity
+        self.images = tuple(images or ())
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["question"],
+            data.get("options", ()),
+            data.get("answer", ""),
+            data.get("explanation", ""),
+            data.get("complexity", "medium"),
+            data.get("images") or ()
+        )
+
+    def to_dict(self):
+        return {
+            "question": self.question,
+            "options": list(self.options),
+            "answer": self.answer,
+            "explanation": self.explanation,
+            "complexity": self.complexity,
+            "images": list(self.images)
+        }
+
+    def __repr__(self):
+        return f"MCQ({self.complexity}: {self.question[:40]!r})"
+
+
+def _counts_dict(counts):
+    return {level: counts[code] for code, level in enumerate(COMPLEXITY_LEVELS)}
+
+
+class MCQBatch:
+    """Columnar store of MCQs with complexity and image counts kept up to date.
+
+    Fields are stored column-wise: complexity and answer as byte codes,
+    options as one flat list with offsets, and images only for the rows that
+    have them. Indexing and iteration produce MCQ records.
+    """
+
+    __slots__ = (
+        "questions", "explanations", "answers", "complexities",
+        "options", "option_offsets", "images", "_complexity_counts", "image_count"
+    )
+
+    def __init__(self):
+        self.questions = []
+        self.explanations = []
+        self.answers = array("b")
+        self.complexities = array("b")
+        self.options = []
+        self.option_offsets = array("L", [0])
+        self.images = {}  # row -> tuple of image dicts, only rows with images
+        self._complexity_counts = [0] * len(COMPLEXITY_LEVELS)
+        self.image_count = 0
+
+    @classmethod
+    def from_dicts(cls, mcqs):
+        batch = cls()
+        batch.extend(mcqs)
+        return batch
+
+    @classmethod
+    def coerce(cls, mcqs):
+        """Use an existing batch (or lazy file) as-is; wrap a list of dicts or MCQs"""
+        if isinstance(mcqs, (MCQBatch, LazyMCQFile)):
+            return mcqs
+        return cls.from_dicts(mcqs or [])
+
+    def append(self, mcq):
+        if isinstance(mcq, dict):
+            mcq = MCQ.from_dict(mcq)
+
+        row = len(self.questions)
+        complexity = _COMPLEXITY_CODES.get(mcq.complexity, _DEFAULT_COMPLEXITY)
+        answer = mcq.answer.upper() if mcq.answer else ""
+
+        self.questions.append(mcq.question)
+        self.explanations.append(mcq.explanation)
+        self.answers.append(ANSWER_LETTERS.index(answer) if answer and answer in ANSWER_LETTERS else -1)
+        self.complexities.append(complexity)
+        self.options.extend(mcq.options)
+        self.option_offsets.append(len(self.options))
+
+        if mcq.images:
+            self.images[row] = tuple(mcq.images)
+            self.image_count += len(mcq.images)
+
+        self._complexity_counts[complexity] += 1
+
+    def extend(self, mcqs):
+        for mcq in mcqs:
+            self.append(mcq)
+
+    @property
+    def complexity_counts(self):
+        return _counts_dict(self._complexity_counts)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+
+        answer_code = self.answers[row]
+        return MCQ(
+            self.questions[row],
+            self.options[self.option_offsets[row]:self.option_offsets[row + 1]],
+            ANSWER_LETTERS[answer_code] if answer_code >= 0 else "",
+            self.explanations[row],
+            COMPLEXITY_LEVELS[self.complexities[row]],
+            self.images.get(row, ())
+        )
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+    def to_dicts(self):
+        return [mcq.to_dict() for mcq in self]
+
+    def write_jsonl(self, path):
+        """Write a header line with counts, then one compact JSON record per question"""
+        with open(path, "w", encoding="utf-8") as f:
+            header = {
+                _HEADER_KEY: _FORMAT_VERSION,
+                "count": len(self),
+                "complexity_counts": self.complexity_counts,
+                "image_count": self.image_count
+            }
+            f.write(json.dumps(header) + "\n")
+            for mcq in self:
+                f.write(json.dumps(mcq.to_dict(), ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    @classmethod
+    def read_jsonl(cls, path):
+        """Load a whole JSONL file into memory"""
+        return cls.from_dicts(iter_jsonl(path))
+
+
+def _read_header(f):
+    header = json.loads(f.readline())
+    if header.get(_HEADER_KEY) != _FORMAT_VERSION:
+        raise ValueError("Not an MCQ batch file")
+    return header
+
+
+def iter_jsonl(path):
+    """Stream MCQ records from a JSONL file one at a time"""
+    with open(path, "r", encoding="utf-8") as f:
+        _read_header(f)
+        for line in f:
+            if line.strip():
+                yield MCQ.from_dict(json.loads(line))
+
+
+class LazyMCQFile:
+    """Read-only view of a JSONL batch file that parses records on access.
+
+    Length and counts come from the header. Line offsets are indexed on the
+    first random access, and iteration streams the file.
+    """
+
+    __slots__ = ("path", "complexity_counts", "image_count", "_count", "_offsets")
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "r", encoding="utf-8") as f:
+            header = _read_header(f)
+        self._count = header["count"]
+        self.complexity_counts = header["complexity_counts"]
+        self.image_count = header["image_count"]
+        self._offsets = None
+
+    def _index_offsets(self):
+        offsets = array("Q")
+        with open(self.path, "rb") as f:
+            f.readline()
+            while True:
+                position = f.tell()
+                line = f.readline()
+                if not line:
+                    break
+                if line.strip():
+                    offsets.append(position)
+        self._offsets = offsets
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, row):
+        if self._offsets is None:
+            self._index_offsets()
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+
+        with open(self.path, "rb") as f:
+            f.seek(self._offsets[row])
+            return MCQ.from_dict(json.loads(f.readline().decode("utf-8")))
+
+    def __iter__(self):
+        return iter_jsonl(self.path)
+
+    def load(self):
+        """Materialize into an in-memory MCQBatch"""
+        return MCQBatch.from_dicts(iter(self))
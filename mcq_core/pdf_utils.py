@@ -1,7 +1,7 @@
-from fpdf import FPDF
 import os
 import re
-from PIL import Image
+
+from mcq_core.models import MCQBatch
 
 
 def clean_text_for_latin1(text):
@@ -26,6 +26,8 @@ def clean_text_for_latin1(text):
 
 def add_image_with_proper_sizing(pdf, img_path, max_width=120, max_height=80):
     """Add image with proper sizing"""
+    from PIL import Image
+
     try:
         if not os.path.exists(img_path):
             return False
@@ -54,10 +56,16 @@ def add_image_with_proper_sizing(pdf, img_path, max_width=120, max_height=80):
 
 
 def generate_mcq_pdf(mcqs, path):
-    """Generate complete MCQ PDF with all options"""
-    if not mcqs:
+    """Generate complete MCQ PDF with all options
+
+    ``mcqs`` may be an MCQBatch, a LazyMCQFile or a list of MCQ dicts.
+    """
+    mcqs = MCQBatch.coerce(mcqs)
+    if not len(mcqs):
         return False
 
+    from fpdf import FPDF
+
     try:
         pdf = FPDF()
         pdf.add_page()
@@ -65,16 +73,9 @@ def generate_mcq_pdf(mcqs, path):
         pdf.cell(0, 10, "Generated MCQs", ln=True, align="C")
         pdf.ln(5)
 
-        # Summary
-        complexity_counts = {'easy': 0, 'medium': 0, 'hard': 0}
-        total_images = 0
-
-        for mcq in mcqs:
-            complexity = mcq.get('complexity', 'medium')
-            if complexity in complexity_counts:
-                complexity_counts[complexity] += 1
-            if mcq.get('images'):
-                total_images += len(mcq['images'])
+        # Summary (counts are precomputed by the batch)
+        complexity_counts = mcqs.complexity_counts
+        total_images = mcqs.image_count
 
         pdf.set_font("Arial", "", 10)
         summary = f"Total: {len(mcqs)} questions (Easy: {complexity_counts['easy']}, Medium: {complexity_counts['medium']}, Hard: {complexity_counts['hard']})"
@@ -92,16 +93,16 @@ def generate_mcq_pdf(mcqs, path):
                 pdf.add_page()
 
             # Question
-            complexity = mcq.get('complexity', 'medium').upper()
+            complexity = mcq.complexity.upper()
             pdf.set_font("Arial", "B", 12)
-            question_text = f"{idx}. [{complexity}] {mcq['question']}"
+            question_text = f"{idx}. [{complexity}] {mcq.question}"
             clean_question = clean_text_for_latin1(question_text)
             pdf.multi_cell(0, 8, clean_question)
             pdf.ln(3)
 
             # Add images with correct source page references
-            if mcq.get('images'):
-                for img in mcq['images']:
+            if mcq.images:
+                for img in mcq.images:
                     if add_image_with_proper_sizing(pdf, img['path']):
                         pdf.ln(3)
                         pdf.set_font("Arial", "", 9)
@@ -115,7 +116,7 @@ def generate_mcq_pdf(mcqs, path):
             pdf.set_font("Arial", "", 11)
             option_letters = ['A', 'B', 'C', 'D']
 
-            options = mcq.get('options', [])
+            options = mcq.options
             if not options:
                 print(f"WARNING: Question {idx} has no options!")
                 options = ['Option A', 'Option B', 'Option C', 'Option D']
@@ -143,9 +144,12 @@ def generate_mcq_pdf(mcqs, path):
 
 def generate_answer_pdf(mcqs, path):
     """Generate answer key PDF"""
-    if not mcqs:
+    mcqs = MCQBatch.coerce(mcqs)
+    if not len(mcqs):
         return False
 
+    from fpdf import FPDF
+
     try:
         pdf = FPDF()
         pdf.add_page()
@@ -157,10 +161,10 @@ def generate_answer_pdf(mcqs, path):
             if pdf.get_y() > 260:
                 pdf.add_page()
 
-            complexity = mcq.get('complexity', 'medium').upper()
+            complexity = mcq.complexity.upper()
             pdf.set_font("Arial", "B", 12)
 
-            correct_answer = mcq.get('answer', 'A')
+            correct_answer = mcq.answer or 'A'
             answer_text = f"{idx}. [{complexity}] Correct Answer: {correct_answer}"
             clean_answer = clean_text_for_latin1(answer_text)
             pdf.multi_cell(0, 8, clean_answer)
@@ -168,13 +172,13 @@ def generate_answer_pdf(mcqs, path):
 
             # Show question briefly
             pdf.set_font("Arial", "", 10)
-            question_brief = f"   Question: {mcq['question'][:80]}..."
+            question_brief = f"   Question: {mcq.question[:80]}..."
             clean_question = clean_text_for_latin1(question_brief)
             pdf.multi_cell(0, 6, clean_question)
             pdf.ln(2)
 
             # Show correct option
-            options = mcq.get('options', [])
+            options = mcq.options
             if options and correct_answer in ['A', 'B', 'C', 'D']:
                 option_index = ord(correct_answer) - ord('A')
                 if 0 <= option_index < len(options):
@@ -184,7 +188,7 @@ def generate_answer_pdf(mcqs, path):
                     pdf.ln(2)
 
             # Explanation
-            explanation = mcq.get('explanation', 'No explanation provided.')
+            explanation = mcq.explanation
             if explanation and explanation.strip():
                 pdf.set_font("Arial", "", 10)
                 explanation_text = f"   Explanation: {explanation}"
@@ -0,0 +1,142 @@
+import os
+import inspect
+
+from mcq_core.doc_index import INDEX_FOLDER, build_document_index, resolve_page_selection
+from mcq_core.extractor import extract_text_and_images_from_pdf
+from mcq_core.generator import generate_mcqs
+from mcq_core.models import MCQBatch
+from mcq_core.pdf_utils import generate_mcq_pdf, generate_answer_pdf
+
+# Resolved once at start-up instead of on every call
+GENERATOR_SUPPORTS_COMPLEXITY = 'complexity_distribution' in inspect.signature(generate_mcqs).parameters
+
+
+def add_image_references_to_mcqs(mcqs, images):
+    """Smart assignment of images only to questions that need them"""
+    if not images:
+        print("DEBUG: No images available")
+        return mcqs
+
+    print(f"DEBUG: Have {len(images)} images for {len(mcqs)} questions")
+
+    # Keywords indicating visual content
+    visual_keywords = [
+        'figure', 'diagram', 'graph', 'chart', 'table', 'image', 'picture',
+        'illustration', 'example', 'shown', 'following', 'given',
+        'tower', 'building', 'angle', 'triangle', 'circle', 'line'
+    ]
+
+    # Only assign images to questions with visual references
+    image_index = 0
+    assigned_count = 0
+
+    for mcq in mcqs:
+        question_lower = mcq['question'].lower()
+
+        # Check if question mentions visual elements
+        has_visual_ref = any(keyword in question_lower for keyword in visual_keywords)
+
+        if has_visual_ref and image_index < len(images):
+            mcq['images'] = [images[image_index]]
+            print(f"DEBUG: Assigned {images[image_index]['filename']} to: {mcq['question'][:50]}...")
+            image_index += 1
+            assigned_count += 1
+        else:
+            mcq['images'] = []  # No image for non-visual questions
+
+    print(f"DEBUG: {assigned_count} questions got images, {len(mcqs) - assigned_count} without images")
+    return mcqs
+
+
+def normalize_complexity_distribution(low_percent, medium_percent, hard_percent):
+    """Clamp slider percentages and normalize them to sum to 100"""
+    low_percent = max(0, min(100, int(low_percent)))
+    medium_percent = max(0, min(100, int(medium_percent)))
+    hard_percent = max(0, min(100, int(hard_percent)))
+
+    total_percent = low_percent + medium_percent + hard_percent
+    if total_percent == 0:
+        low_percent = medium_percent = hard_percent = 33
+        total_percent = 99
+
+    low_percent = int(low_percent * 100 / total_percent)
+    medium_percent = int(medium_percent * 100 / total_percent)
+    hard_percent = 100 - low_percent - medium_percent
+
+    return {
+        'low': low_percent,
+        'medium': medium_percent,
+        'hard': hard_percent
+    }
+
+
+def extract_document(file_path, max_pages, image_folder, page_range=None, chapter=None,
+                     index_folder=INDEX_FOLDER, progress=None):
+    """Extraction stage: text and images for the selected pages of one PDF.
+
+    Pages come from ``page_range`` ("5-9, 12"), a TOC ``chapter`` (title or
+    chapter number), or else the first ``max_pages``. Raises ValueError if
+    the selection is invalid or empty. Kept at module level so it can be
+    shipped to a process pool.
+    """
+    doc_index = build_document_index(file_path, index_folder)
+    selected_pages = resolve_page_selection(doc_index, page_range, chapter, max_pages)
+    if not selected_pages:
+        raise ValueError("No pages match the requested range or chapter.")
+
+    result = extract_text_and_images_from_pdf(
+        file_path,
+        max_pages=max_pages,
+        output_folder=image_folder,
+        pages=selected_pages,
+        doc_index=doc_index,
+        progress=progress
+    )
+    result["pages"] = [page_num + 1 for page_num in selected_pages]
+    return result
+
+
+def generate_document_mcqs(extraction_result, questions_requested, complexity_distribution,
+                           progress=None, should_cancel=None):
+    """Generation stage: an MCQBatch for one extracted document, with images attached
+
+    ``progress`` and ``should_cancel`` are passed through to generate_mcqs.
+    """
+    if not extraction_result["text"].strip():
+        return MCQBatch()
+
+    if GENERATOR_SUPPORTS_COMPLEXITY:
+        mcqs = generate_mcqs(
+            extraction_result["text"], questions_requested, complexity_distribution,
+            progress=progress, should_cancel=should_cancel
+        )
+    else:
+        mcqs = generate_mcqs(extraction_result["text"], questions_requested)
+
+    if mcqs and extraction_result["images"]:
+        mcqs = add_image_references_to_mcqs(mcqs, extraction_result["images"])
+
+    return MCQBatch.from_dicts(mcqs)
+
+
+def write_document_outputs(mcqs, output_folder):
+    """Rendering stage: questions PDF, answer key PDF and JSONL for one document.
+
+    Returns a dict of the written paths, or None if any PDF failed.
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    mcqs = MCQBatch.coerce(mcqs)
+
+    mcq_path = os.path.join(output_folder, "mcqs.pdf")
+    ans_path = os.path.join(output_folder, "answers.pdf")
+    jsonl_path = os.path.join(output_folder, "mcqs.jsonl")
+
+    if not generate_mcq_pdf(mcqs, mcq_path):
+        return None
+
+    if not generate_answer_pdf(mcqs, ans_path):
+        return None
+
+    mcqs.write_jsonl(jsonl_path)
+
+    return {"mcq_pdf": mcq_path, "answer_pdf": ans_path, "jsonl": jsonl_path}
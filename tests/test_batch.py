@@ -0,0 +1,166 @@
+"""Checkpoint resume and input collection for the batch CLI"""
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import batch
+from mcq_core.models import MCQBatch
+
+PARAMS = {
+    "pages": 2,
+    "questions": 10,
+    "complexity_distribution": {"low": 40, "medium": 40, "hard": 20},
+    "page_range": None,
+    "chapter": None,
+}
+
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+    return path
+
+
+def test_collect_pdf_paths_merges_manifest_and_deduplicates(tmp_path):
+    a = touch(str(tmp_path / "library" / "a.pdf"))
+    b = touch(str(tmp_path / "library" / "nested" / "b.PDF"))
+    (tmp_path / "library" / "notes.txt").write_text("not a pdf")
+    c = touch(str(tmp_path / "other" / "c.pdf"))
+
+    manifest = tmp_path / "books.txt"
+    manifest.write_text(f"# course reading\n\n{a}\n{c}\n{tmp_path / 'missing.pdf'}\n")
+
+    paths = batch.collect_pdf_paths([str(tmp_path / "library"), a], str(manifest))
+
+    assert paths == sorted(os.path.abspath(p) for p in (a, b, c))
+
+
+def test_load_checkpoint_starts_fresh_without_a_file(tmp_path):
+    checkpoint = batch.load_checkpoint(str(tmp_path / "checkpoint.json"), PARAMS)
+    assert checkpoint == {"params": PARAMS, "completed": {}, "failed": {}}
+
+
+def test_load_checkpoint_refuses_mismatched_settings(tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    batch.save_checkpoint({"params": PARAMS, "completed": {"/a.pdf": {}}, "failed": {}}, checkpoint_path)
+
+    assert batch.load_checkpoint(checkpoint_path, PARAMS)["completed"] == {"/a.pdf": {}}
+    with pytest.raises(ValueError, match="different settings"):
+        batch.load_checkpoint(checkpoint_path, dict(PARAMS, questions=20))
+
+
+def test_load_checkpoint_without_progress_adopts_new_settings(tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    batch.save_checkpoint({"params": PARAMS, "completed": {}, "failed": {}}, checkpoint_path)
+
+    new_params = dict(PARAMS, questions=20)
+    assert batch.load_checkpoint(checkpoint_path, new_params)["params"] == new_params
+
+
+@pytest.fixture
+def fake_stages(monkeypatch):
+    """Replace extraction/generation with recorders; threads instead of processes"""
+    calls = {"extract": [], "generate": []}
+
+    def fake_extract(pdf_path, pages, image_folder, page_range, chapter, index_folder):
+        calls["extract"].append(pdf_path)
+        return {"text": f"text of {pdf_path}", "images": []}
+
+    def fake_generate(extraction_result, questions, complexity_distribution, output_folder):
+        calls["generate"].append(extraction_result["text"])
+        return {"outputs": {}, "questions": questions, "images": 0, "complexity_counts": {}}
+
+    monkeypatch.setattr(batch, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(batch, "extract_document", fake_extract)
+    monkeypatch.setattr(batch, "generate_and_write", fake_generate)
+    return calls
+
+
+def write_outputs(folder, questions=3):
+    """Output files for a completed document, as write_document_outputs leaves them"""
+    os.makedirs(folder, exist_ok=True)
+    outputs = {name: os.path.join(folder, name) for name in ("mcqs.pdf", "answers.pdf", "mcqs.jsonl")}
+    for name in ("mcqs.pdf", "answers.pdf"):
+        touch(outputs[name])
+    MCQBatch.from_dicts(
+        {"question": f"Q{i}?", "options": ["a", "b", "c", "d"], "answer": "A"} for i in range(questions)
+    ).write_jsonl(outputs["mcqs.jsonl"])
+    return {
+        "outputs": {"mcq_pdf": outputs["mcqs.pdf"], "answer_pdf": outputs["answers.pdf"], "jsonl": outputs["mcqs.jsonl"]},
+        "questions": questions,
+    }
+
+
+def run(pdf_paths, output_dir, **kwargs):
+    return batch.run_batch(
+        pdf_paths, str(output_dir), PARAMS["pages"], PARAMS["questions"],
+        PARAMS["complexity_distribution"], workers=2, llm_concurrency=2, **kwargs
+    )
+
+
+def test_resume_skips_completed_and_retries_failed(tmp_path, fake_stages):
+    checkpoint_path = tmp_path / "out" / batch.CHECKPOINT_FILENAME
+    os.makedirs(checkpoint_path.parent)
+    batch.save_checkpoint({
+        "params": PARAMS,
+        "completed": {"/books/done.pdf": write_outputs(str(tmp_path / "out" / "done"))},
+        "failed": {"/books/flaky.pdf": "generate: timeout"},
+    }, str(checkpoint_path))
+
+    stats = run(["/books/done.pdf", "/books/flaky.pdf", "/books/new.pdf"], tmp_path / "out")
+
+    assert sorted(fake_stages["extract"]) == ["/books/flaky.pdf", "/books/new.pdf"]
+    assert stats["completed"] == 2 and stats["failed"] == 0
+
+    with open(checkpoint_path, "r", encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    assert sorted(checkpoint["completed"]) == ["/books/done.pdf", "/books/flaky.pdf", "/books/new.pdf"]
+    assert checkpoint["failed"] == {}
+
+
+def test_resume_regenerates_documents_with_missing_outputs(tmp_path, fake_stages):
+    checkpoint_path = tmp_path / "out" / batch.CHECKPOINT_FILENAME
+    intact = write_outputs(str(tmp_path / "out" / "intact"))
+    deleted = write_outputs(str(tmp_path / "out" / "deleted"))
+    os.remove(deleted["outputs"]["answer_pdf"])
+    truncated = write_outputs(str(tmp_path / "out" / "truncated"))
+    truncated["questions"] = 10  # checkpoint disagrees with the JSONL header
+    batch.save_checkpoint({
+        "params": PARAMS,
+        "completed": {"/books/intact.pdf": intact, "/books/deleted.pdf": deleted, "/books/truncated.pdf": truncated},
+        "failed": {},
+    }, str(checkpoint_path))
+
+    run(["/books/intact.pdf", "/books/deleted.pdf", "/books/truncated.pdf"], tmp_path / "out")
+
+    assert sorted(fake_stages["extract"]) == ["/books/deleted.pdf", "/books/truncated.pdf"]
+
+
+def test_restart_ignores_checkpoint(tmp_path, fake_stages):
+    checkpoint_path = tmp_path / "out" / batch.CHECKPOINT_FILENAME
+    os.makedirs(checkpoint_path.parent)
+    batch.save_checkpoint({
+        "params": dict(PARAMS, questions=30),
+        "completed": {"/books/done.pdf": {"questions": 30}},
+        "failed": {},
+    }, str(checkpoint_path))
+
+    run(["/books/done.pdf"], tmp_path / "out", restart=True)
+
+    assert fake_stages["extract"] == ["/books/done.pdf"]
+
+
+def test_failed_extraction_is_recorded_for_retry(tmp_path, fake_stages, monkeypatch):
+    def failing_extract(pdf_path, *args):
+        raise ValueError("No pages match the requested range or chapter.")
+
+    monkeypatch.setattr(batch, "extract_document", failing_extract)
+    stats = run(["/books/short.pdf"], tmp_path / "out")
+
+    with open(tmp_path / "out" / batch.CHECKPOINT_FILENAME, "r", encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    assert stats["failed"] == 1
+    assert checkpoint["failed"] == {"/books/short.pdf": "extract: No pages match the requested range or chapter."}
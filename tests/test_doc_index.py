@@ -0,0 +1,139 @@
+"""Page selection and cache eviction for the document index"""
+import os
+import time
+
+import pytest
+
+from mcq_core import doc_index
+
+
+def write_cache_entry(folder, content_hash, text_bytes, last_used):
+    for suffix, data in ((".txt", b"x" * text_bytes), (".json", b"{}")):
+        path = os.path.join(folder, content_hash + suffix)
+        with open(path, "wb") as f:
+            f.write(data)
+    os.utime(os.path.join(folder, content_hash + ".json"), (last_used, last_used))
+
+
+def test_prune_evicts_entries_past_max_age(tmp_path):
+    now = time.time()
+    write_cache_entry(str(tmp_path), "old", 10, now - 3600)
+    write_cache_entry(str(tmp_path), "new", 10, now)
+
+    evicted = doc_index.prune_index_cache(str(tmp_path), max_bytes=10 ** 6, max_age_seconds=60)
+
+    assert evicted == ["old"]
+    assert sorted(os.listdir(tmp_path)) == ["new.json", "new.txt"]
+
+
+def test_prune_evicts_least_recently_used_until_under_size(tmp_path):
+    now = time.time()
+    for age, content_hash in enumerate(["c", "b", "a"]):
+        write_cache_entry(str(tmp_path), content_hash, 100, now - age)
+
+    # Each entry is 102 bytes; "a" is least recently used, "c" is kept explicitly
+    evicted = doc_index.prune_index_cache(str(tmp_path), max_bytes=150, max_age_seconds=3600, keep="c")
+
+    assert evicted == ["a", "b"]
+    assert sorted(os.listdir(tmp_path)) == ["c.json", "c.txt"]
+
+
+def test_prune_removes_orphaned_text(tmp_path):
+    orphan = tmp_path / "orphan.txt"
+    orphan.write_bytes(b"text without index")
+    os.utime(orphan, (time.time() - 3600, time.time() - 3600))
+
+    doc_index.prune_index_cache(str(tmp_path), max_bytes=10 ** 6, max_age_seconds=60)
+
+    assert os.listdir(tmp_path) == []
+
+
+def make_index(page_count=25):
+    """A textbook-like index: front matter, numbered chapters, nested sections"""
+    toc = [
+        (1, "Cover", 1),
+        (1, "Preface", 2),
+        (1, "Contents", 3),
+        (1, "Chapter 1 Basics", 5),
+        (2, "1.1 Sets", 5),
+        (2, "1.2 Maps", 8),
+        (1, "2 Geometry", 12),
+        (2, "2.1 Angles", 12),
+        (3, "2.1.1 Right angles", 13),
+        (2, "2.2 Circles", 15),
+        (1, "Appendix", 20),
+        (2, "Broken link", -1),
+    ]
+    return {
+        "page_count": page_count,
+        "toc": [{"level": level, "title": title, "page": page} for level, title, page in toc],
+    }
+
+
+def pages(first, last):
+    """0-based page numbers for 1-based inclusive pages first..last"""
+    return list(range(first - 1, last))
+
+
+def test_parse_page_range_merges_and_sorts():
+    assert doc_index.parse_page_range("8-9, 2, 8, 3 - 4", 20) == [1, 2, 3, 7, 8]
+
+
+def test_parse_page_range_clamps_to_page_count():
+    assert doc_index.parse_page_range("18-30", 20) == pages(18, 20)
+    assert doc_index.parse_page_range("25", 20) == []
+
+
+@pytest.mark.parametrize("page_range", ["9-5", "0-3", "abc", "1-2-3", "-4"])
+def test_parse_page_range_rejects_invalid_parts(page_range):
+    with pytest.raises(ValueError):
+        doc_index.parse_page_range(page_range, 20)
+
+
+def test_numeric_chapter_matches_numbered_title_before_position():
+    index = make_index()
+    # Positionally, "2" would be the Preface
+    assert doc_index.find_chapter_pages(index, "2") == pages(12, 19)
+    assert doc_index.find_chapter_pages(index, "1") == pages(5, 11)
+
+
+def test_numeric_chapter_falls_back_to_top_level_position():
+    # Fifth top-level entry; no title is numbered 5
+    assert doc_index.find_chapter_pages(make_index(), "5") == pages(12, 19)
+    with pytest.raises(ValueError):
+        doc_index.find_chapter_pages(make_index(), "9")
+
+
+def test_chapter_title_match_ends_at_next_entry_of_same_or_higher_level():
+    index = make_index()
+    # Spans its deeper 2.1.1 subsection, stops at 2.2
+    assert doc_index.find_chapter_pages(index, "2.1 angles") == pages(12, 14)
+    assert doc_index.find_chapter_pages(index, "1.2") == pages(8, 11)
+    # The last chapter runs to the end of the document
+    assert doc_index.find_chapter_pages(index, "Appendix") == pages(20, 25)
+
+
+def test_toc_entries_without_a_page_are_ignored():
+    with pytest.raises(ValueError):
+        doc_index.find_chapter_pages(make_index(), "Broken link")
+
+
+def test_resolve_page_selection_precedence_and_default():
+    index = make_index()
+    assert doc_index.resolve_page_selection(index, "3", "2") == [2]
+    assert doc_index.resolve_page_selection(index, None, "2") == pages(12, 19)
+    assert doc_index.resolve_page_selection(index, max_pages=4) == pages(1, 4)
+    assert doc_index.resolve_page_selection(index, max_pages=100) == pages(1, 25)
+
+
+def test_resolve_page_selection_caps_ranges_and_chapters():
+    index = make_index(page_count=200)
+    limit = doc_index.MAX_SELECTED_PAGES
+
+    assert len(doc_index.resolve_page_selection(index, f"1-{limit}")) == limit
+    with pytest.raises(ValueError, match="at most"):
+        doc_index.resolve_page_selection(index, f"1-{limit + 1}")
+    # The appendix now runs from page 20 to 200
+    with pytest.raises(ValueError, match="at most"):
+        doc_index.resolve_page_selection(index, None, "Appendix")
+    assert len(doc_index.resolve_page_selection(index, max_pages=200)) == limit
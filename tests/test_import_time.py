@@ -0,0 +1,59 @@
+"""Start-up cost guard: heavy dependencies must stay lazy.
+
+Runs ``python -X importtime`` in a subprocess so the measurement isn't
+polluted by modules this test process already imported.
+"""
+import os
+import sys
+import subprocess
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use only (see mcq_core/extractor.py, generator.py, pdf_utils.py, llm_client.py)
+HEAVY_MODULES = ("fitz", "openai", "PIL", "fpdf", "requests")
+
+# Generous cumulative budget for ``import app``; override on slow CI machines
+APP_IMPORT_BUDGET_US = int(os.getenv("MCQ_IMPORT_BUDGET_US", 1_500_000))
+
+
+def import_times(statement, cwd):
+    """Return {module: cumulative_microseconds} for everything ``statement`` imports"""
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True
+    )
+
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def heavy_imports(times):
+    return sorted(name for name in times if name.split(".")[0] in HEAVY_MODULES)
+
+
+def test_core_modules_do_not_import_heavy_dependencies(tmp_path):
+    times = import_times(
+        "import mcq_core.pipeline, mcq_core.doc_index, mcq_core.jobs, mcq_core.llm_client",
+        tmp_path
+    )
+    assert "mcq_core.pipeline" in times
+    assert heavy_imports(times) == []
+
+
+def test_app_import_is_lazy_and_within_budget(tmp_path):
+    pytest.importorskip("flask")
+    pytest.importorskip("dotenv")
+
+    # cwd is a temp dir because create_app() makes its working folders there
+    times = import_times("import app", tmp_path)
+
+    assert heavy_imports(times) == []
+    assert times["app"] < APP_IMPORT_BUDGET_US, f"import app took {times['app']}us"
@@ -0,0 +1,85 @@
+"""File-backed job state: expiry of dead jobs and purging of old ones"""
+import os
+
+from mcq_core import jobs
+
+
+def test_stale_unfinished_job_is_marked_failed(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    job_id = jobs.create_job({}, folder)
+    jobs.update_job(job_id, folder, status="running")
+
+    assert jobs.load_job(job_id, folder)["status"] == "running"
+
+    monkeypatch.setattr(jobs, "JOB_STALE_SECONDS", -1)
+    job = jobs.load_job(job_id, folder)
+    assert job["status"] == "failed"
+    assert "stopped responding" in job["error"]
+
+
+def test_finished_job_is_never_stale(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    job_id = jobs.create_job({}, folder)
+    jobs.update_job(job_id, folder, status="done", result={"question_count": 3})
+
+    monkeypatch.setattr(jobs, "JOB_STALE_SECONDS", -1)
+    assert jobs.load_job(job_id, folder)["status"] == "done"
+
+
+def test_purge_removes_only_expired_finished_jobs(tmp_path):
+    folder = str(tmp_path)
+    finished = jobs.create_job({}, folder)
+    jobs.update_job(finished, folder, status="cancelled")
+    jobs.append_job_event(finished, {"stage": "status", "status": "running"}, folder)
+    jobs.request_cancel(finished, folder)
+    running = jobs.create_job({}, folder)
+    jobs.update_job(running, folder, status="running")
+
+    assert jobs.purge_expired_jobs(folder, ttl_seconds=3600) == 0
+    assert jobs.purge_expired_jobs(folder, ttl_seconds=-1) == 1
+
+    assert os.listdir(folder) == [f"{running}.json"]
+    assert jobs.load_job(finished, folder) is None
+
+
+def test_read_job_events_resumes_from_offset(tmp_path):
+    folder = str(tmp_path)
+    job_id = jobs.create_job({}, folder)
+    for page in (1, 2, 3):
+        jobs.append_job_event(job_id, {"stage": "extract", "page": page}, folder)
+
+    events, offset = jobs.read_job_events(job_id, 0, folder)
+    assert [e["page"] for e in events] == [1, 2, 3]
+
+    jobs.append_job_event(job_id, {"stage": "render"}, folder)
+    events, _ = jobs.read_job_events(job_id, offset, folder)
+    assert [e["stage"] for e in events] == ["render"]
+
+
+def test_read_job_events_realigns_client_offsets(tmp_path):
+    folder = str(tmp_path)
+    job_id = jobs.create_job({}, folder)
+    for page in (1, 2, 3):
+        jobs.append_job_event(job_id, {"stage": "extract", "page": page}, folder)
+    _, end = jobs.read_job_events(job_id, 0, folder)
+
+    # Mid-line: skip to the start of the next event
+    events, offset = jobs.read_job_events(job_id, 5, folder)
+    assert [e["page"] for e in events] == [2, 3]
+    assert offset == end
+
+    # Past the end of the log: start over
+    events, _ = jobs.read_job_events(job_id, end + 1000, folder)
+    assert [e["page"] for e in events] == [1, 2, 3]
+
+
+def test_read_job_events_waits_for_a_partial_line(tmp_path):
+    folder = str(tmp_path)
+    job_id = jobs.create_job({}, folder)
+    jobs.append_job_event(job_id, {"stage": "status"}, folder)
+    _, end = jobs.read_job_events(job_id, 0, folder)
+    with open(tmp_path / f"{job_id}.events.jsonl", "ab") as f:
+        f.write(b'{"stage": "ext')
+
+    assert jobs.read_job_events(job_id, end, folder) == ([], end)
+    assert jobs.read_job_events(job_id, end + 3, folder) == ([], end + 3)
@@ -0,0 +1,97 @@
+"""Columnar MCQ storage and the JSONL batch format"""
+import json
+
+import pytest
+
+from mcq_core.models import MCQ, MCQBatch, LazyMCQFile, iter_jsonl
+
+IMAGE = {"filename": "source_page_3_img_1.png", "path": "temp_images/x/source_page_3_img_1.png", "page": 3}
+
+
+def sample_dicts():
+    return [
+        {"question": "What is 2 + 2?", "options": ["3", "4", "5", "6"], "answer": "B",
+         "explanation": "Addition", "complexity": "easy", "images": []},
+        {"question": "Which figure shows a right angle?", "options": ["A", "B", "C", "D"], "answer": "d",
+         "explanation": "", "complexity": "hard", "images": [IMAGE, dict(IMAGE, filename="second.png")]},
+        {"question": "Pick one", "options": ["x", "y"], "answer": "", "complexity": "unknown"},
+        {"question": "Café ≠ cafe?", "options": ["Yes", "No", "Maybe", "Never"], "answer": "A",
+         "explanation": "Unicode", "complexity": "medium", "images": [IMAGE]},
+    ]
+
+
+def test_from_dicts_round_trip_and_counts():
+    batch = MCQBatch.from_dicts(sample_dicts())
+
+    assert len(batch) == 4
+    assert batch.complexity_counts == {"easy": 1, "medium": 2, "hard": 1}
+    assert batch.image_count == 3
+
+    dicts = batch.to_dicts()
+    assert [d["answer"] for d in dicts] == ["B", "D", "", "A"]
+    # Unknown complexity falls back to medium
+    assert [d["complexity"] for d in dicts] == ["easy", "hard", "medium", "medium"]
+    assert dicts[1]["images"] == sample_dicts()[1]["images"]
+    assert dicts[2]["options"] == ["x", "y"]
+    assert dicts[2]["explanation"] == "" and dicts[2]["images"] == []
+    assert dicts[3] == sample_dicts()[3]
+
+
+def test_batch_indexing():
+    batch = MCQBatch.from_dicts(sample_dicts())
+
+    assert isinstance(batch[0], MCQ)
+    assert batch[-1].question == "Café ≠ cafe?"
+    assert batch[1].images == tuple(sample_dicts()[1]["images"])
+    with pytest.raises(IndexError):
+        batch[4]
+    with pytest.raises(IndexError):
+        batch[-5]
+
+
+def test_coerce_wraps_lists_and_keeps_batches():
+    batch = MCQBatch.from_dicts(sample_dicts())
+    assert MCQBatch.coerce(batch) is batch
+    assert len(MCQBatch.coerce(None)) == 0
+    assert MCQBatch.coerce([MCQ("Q?", ["a", "b"], "A")])[0].answer == "A"
+
+
+def test_jsonl_header_and_lazy_file(tmp_path):
+    path = str(tmp_path / "mcqs.jsonl")
+    batch = MCQBatch.from_dicts(sample_dicts())
+    batch.write_jsonl(path)
+
+    with open(path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+    assert header["count"] == 4 and header["image_count"] == 3
+
+    lazy = LazyMCQFile(path)
+    assert len(lazy) == 4
+    assert lazy.complexity_counts == batch.complexity_counts
+    assert lazy.image_count == 3
+    assert lazy[2].options == ("x", "y")
+    assert lazy[-1].question == "Café ≠ cafe?"
+    assert lazy[0].to_dict() == batch[0].to_dict()
+    with pytest.raises(IndexError):
+        lazy[4]
+    with pytest.raises(IndexError):
+        lazy[-5]
+
+    assert [mcq.to_dict() for mcq in lazy] == batch.to_dicts()
+    assert lazy.load().to_dicts() == batch.to_dicts()
+    assert MCQBatch.read_jsonl(path).to_dicts() == batch.to_dicts()
+    assert MCQBatch.coerce(lazy) is lazy
+
+
+def test_readers_reject_files_without_batch_header(tmp_path):
+    path = tmp_path / "plain.jsonl"
+    path.write_text(json.dumps(sample_dicts()[0]) + "\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="Not an MCQ batch file"):
+        LazyMCQFile(str(path))
+    with pytest.raises(ValueError, match="Not an MCQ batch file"):
+        list(iter_jsonl(str(path)))
+
+    path.write_text(json.dumps({"mcq_batch": 99, "count": 0}) + "\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        LazyMCQFile(str(path))